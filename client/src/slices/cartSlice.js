@@ -25,6 +25,18 @@ export const addToCart = createAsyncThunk(
   }
 );
 
+export const applyCartOperations = createAsyncThunk(
+  '/applyCartOperations',
+  async ({ operations }, { rejectWithValue }) => {
+    try {
+      const { data } = await Axios.post(`/cart/batch`, { operations });
+      return data;
+    } catch (err) {
+      return rejectWithValue(err.response?.data?.message || err.message);
+    }
+  }
+);
+
 export const updateCartItem = createAsyncThunk(
   '/updateCartItem',
   async ({ cartItemId, quantity }, { rejectWithValue }) => {
@@ -110,6 +122,21 @@ const cartSlice = createSlice({
         state.error = action.payload;
       })
 
+      .addCase(applyCartOperations.pending, (state) => {
+        state.loading = true;
+        state.error = null;
+        state.success = null;
+      })
+      .addCase(applyCartOperations.fulfilled, (state, action) => {
+        state.cart = action.payload;
+        state.loading = false;
+        state.success = 'Cart updated successfully.';
+      })
+      .addCase(applyCartOperations.rejected, (state, action) => {
+        state.loading = false;
+        state.error = action.payload;
+      })
+
       .addCase(updateCartItem.pending, (state) => {
         state.loading = true;
         state.error = null;
@@ -62,6 +62,20 @@ export const getCategoryBySlug = createAsyncThunk(
     }
 );
   
+export const getCategoryProducts = createAsyncThunk(
+    '/getCategoryProducts',
+    async ({ slug, page = 1, perPage = 10, sort }, { rejectWithValue }) => {
+      try {
+        let url = `/categories/slug/${slug}/products?page=${page}&per_page=${perPage}`;
+        if (sort) url += `&sort=${sort}`;
+        const { data } = await Axios.get(url);
+        return data;
+      } catch (err) {
+        return rejectWithValue(err.response?.data?.message || err.message);
+      }
+    }
+);
+
 export const getCategoryBreadcrumbs = createAsyncThunk(
     '/getCategoryBreadcrumbs',
     async ({ categoryId }, { rejectWithValue }) => {
@@ -224,6 +238,24 @@ const categorySlice = createSlice({
         state.error = action.payload;
     })
 
+    .addCase(getCategoryProducts.pending, (state, action) => {
+        if (state.category?.slug !== action.meta.arg.slug) {
+          state.loading = true;
+        }
+        state.error = null;
+        state.success = null;
+    })
+    .addCase(getCategoryProducts.fulfilled, (state, action) => {
+        state.category = action.payload.category;
+        state.breadcrumbs = action.payload.breadcrumbs;
+        state.loading = false;
+    })
+    .addCase(getCategoryProducts.rejected, (state, action) => {
+        state.category = null;
+        state.loading = false;
+        state.error = action.payload;
+    })
+
     .addCase(getCategoryBreadcrumbs.pending, (state) => {
         state.loading = true;
         state.error = null;
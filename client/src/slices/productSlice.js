@@ -1,5 +1,6 @@
 import Axios from '../axios';
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
+import { getCategoryProducts } from './categorySlice';
 
 export const getProducts = createAsyncThunk(
   '/getProducts',
@@ -196,6 +197,13 @@ const productSlice = createSlice({
         state.loading = false;
         state.error = action.payload;
       })
+
+      .addCase(getCategoryProducts.fulfilled, (state, action) => {
+        state.products = action.payload.products;
+        state.count = action.payload.count;
+        state.totalPages = action.payload.total_pages;
+        state.currentPage = action.payload.page;
+      })
       
       .addCase(getProduct.pending, (state) => {
         state.loading = true;
@@ -42,15 +42,7 @@ const Cart = () => {
     dispatch(removeCartItem({ cartItemId }));
   };
 
-  const getItemImage = (item) => {
-    if (item.variant?.images?.length > 0) {
-      return item.variant.images[0].url;
-    }
-    if (item.product?.images?.length > 0) {
-      return item.product.images[0].url;
-    }
-    return '';
-  };
+  const getItemImage = (item) => item.thumbnail || '';
 
   const cartItemCount = cart?.items?.length || 0;
 
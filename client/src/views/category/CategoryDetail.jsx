@@ -5,8 +5,7 @@ import { Pagination, Card, CardContent, LinearProgress, Chip, Box, Breadcrumbs,
 import { ShoppingBagOutlined as ShoppingBagOutlinedIcon, ImageNotSupportedOutlined as ImageNotSupportedOutlinedIcon, Inventory2Outlined as Inventory2OutlinedIcon, ExpandMore as ExpandMoreIcon, ExpandLess as ExpandLessIcon, NavigateNext as NavigateNextIcon } from '@mui/icons-material';
 
 import ProductCard from '../product/ProductCard';
-import { getProducts } from '../../slices/productSlice';
-import { getCategoryBySlug, getCategoryBreadcrumbs, clearCategoryMessages } from '../../slices/categorySlice';
+import { getCategoryProducts, clearCategoryMessages } from '../../slices/categorySlice';
 
 const CategoryDetail = () => {
   const { categorySlug } = useParams();
@@ -21,27 +20,12 @@ const CategoryDetail = () => {
 
   useEffect(() => {
     if (categorySlug) {
-      dispatch(getCategoryBySlug({ slug: categorySlug, includeSubcategories: true }));
+      dispatch(getCategoryProducts({ slug: categorySlug, page: 1, perPage }));
     }
-  }, [dispatch, categorySlug]);
-
-  useEffect(() => {
-    if (category?.id) {
-      dispatch(getCategoryBreadcrumbs({ categoryId: category.id }));
-      const categoryIds = [category.id];
-      if (category.subcategories && category.subcategories.length > 0) {
-        categoryIds.push(...category.subcategories.map(sub => sub.id));
-      }
-      dispatch(getProducts({ categoryIds, page: 1, perPage }));
-    }
-  }, [dispatch, category?.id, category?.subcategories, perPage]);
+  }, [dispatch, categorySlug, perPage]);
 
   const handlePageChange = (page) => {
-    const categoryIds = [category.id];
-    if (category.subcategories && category.subcategories.length > 0) {
-      categoryIds.push(...category.subcategories.map(sub => sub.id));
-    }
-    dispatch(getProducts({ categoryIds, page, perPage }));
+    dispatch(getCategoryProducts({ slug: categorySlug, page, perPage }));
   };
 
   const handleAddToCartSuccess = () => {
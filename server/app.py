@@ -5,6 +5,7 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 
 from models.base import db
+from json_provider import OrjsonProvider
 
 migrate = Migrate()
 
@@ -12,6 +13,7 @@ def create_app():
     app = Flask(__name__)
    
     app.config.from_object(Configuration)
+    app.json = OrjsonProvider(app)
     CORS(app, supports_credentials=True, origins='*')
     
     JWTManager(app)
@@ -38,4 +40,9 @@ def create_app():
     app.register_blueprint(payment_blueprint)
     app.register_blueprint(category_blueprint)
 
+    from commands import build_recommendations_command, compact_carts_command
+
+    app.cli.add_command(build_recommendations_command)
+    app.cli.add_command(compact_carts_command)
+
     return app
\ No newline at end of file
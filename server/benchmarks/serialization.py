@@ -0,0 +1,169 @@
+"""Measure the cost of serializing a 100-product page, against the
+legacy per-field to_dict encoded by Flask's default provider.
+
+Run from the server directory:
+
+    python -m benchmarks.serialization
+"""
+import timeit
+from decimal import Decimal
+from typing import Any, Dict
+from flask import Flask
+from datetime import datetime, timezone
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import OrjsonProvider
+from models.user import User
+from models.address import Address
+from models.review import Review
+from models.category import Category
+from models.cart import Cart, CartItem
+from models.order import Order, OrderItem
+from models.payment import Payment
+from models.product import Product, ProductVariant, ProductImage
+
+def build_products(count: int = 100):
+    now = datetime.now(timezone.utc)
+    category = Category(id=1, name='Skincare', slug='skincare')
+    user = User(id=1, email='customer@example.com', first_name='Juan', last_name='Dela Cruz', country_code='+63', phone_number='9171234567', is_admin=False, created_at=now, updated_at=now)
+    user.addresses = [Address(id=1, type='shipping', line_1='1 Ayala Avenue', line_2=None, city='Makati', zip_code='1226', country='PH', created_at=now, updated_at=now)]
+    products = []
+    for i in range(count):
+        product = Product(
+            id=i, name=f'Product {i}', slug=f'product-{i}', description='Description ' * 20, benefits='Benefits', ingredients='Ingredients',
+            instructions='Instructions', is_active=True, is_featured=i % 5 == 0, meta_title=f'Product {i}', meta_description='Meta', weight=Decimal('0.25'), width=Decimal('5.00'), height=Decimal('10.00'),
+            length=Decimal('5.00'), option1_name='Size', option2_name=None, option3_name=None, category_id=1, average_rating=Decimal('4.50'), review_count=5, total_stock=30,
+            display_price=Decimal('499.00'), base_price=Decimal('599.00'), sale_price=Decimal('499.00'), stock=0, created_at=now, updated_at=now
+        )
+        product.category = category
+        product.variants = [
+            ProductVariant(id=i * 3 + j, product_id=i, name=f'Product {i} - {j}', base_price=Decimal('599.00'), sale_price=Decimal('499.00'), stock=10, option1_value=str(j), option2_value=None, option3_value=None, created_at=now, updated_at=now)
+            for j in range(3)
+        ]
+        product.images = [ProductImage(id=i * 3 + j, product_id=i, variant_id=None, url=f'https://storage.googleapis.com/products/{i}-{j}.jpg', created_at=now, updated_at=now) for j in range(3)]
+        product.reviews = [Review(id=i * 5 + j, user_id=1, product_id=i, rating=4, title='Great', content='Works well.', is_verified=True, is_approved=True, created_at=now, updated_at=now) for j in range(5)]
+        for review in product.reviews:
+            review.user = user
+        products.append(product)
+    return products
+
+def legacy_address_dict(address: Address) -> Dict[str, Any]:
+    return {
+        'id': address.id,
+        'type': address.type,
+        'line_1': address.line_1,
+        'line_2': address.line_2,
+        'city': address.city,
+        'zip_code': address.zip_code,
+        'country': address.country,
+    }
+
+def legacy_user_dict(user: User) -> Dict[str, Any]:
+    return {
+        'id': user.id,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'country_code': user.country_code,
+        'phone_number': user.phone_number,
+        'is_admin': user.is_admin,
+        'addresses': [legacy_address_dict(address) for address in user.addresses],
+    }
+
+def legacy_review_dict(review: Review) -> Dict[str, Any]:
+    return {
+        "id": review.id,
+        "user_id": review.user_id,
+        "product_id": review.product_id,
+        "rating": review.rating,
+        "title": review.title,
+        "content": review.content,
+        "is_verified": review.is_verified,
+        "is_approved": review.is_approved,
+        "user": legacy_user_dict(review.user) if review.user else None,
+    }
+
+def legacy_image_dict(image: ProductImage) -> Dict[str, Any]:
+    return {
+        "id": image.id,
+        "product_id": image.product_id,
+        "variant_id": image.variant_id,
+        "url": image.url,
+        "created_at": image.created_at.isoformat() if image.created_at else None,
+        "updated_at": image.updated_at.isoformat() if image.updated_at else None,
+    }
+
+def legacy_variant_dict(variant: ProductVariant) -> Dict[str, Any]:
+    return {
+        "id": variant.id,
+        "product_id": variant.product_id,
+        "name": variant.name,
+        "base_price": float(variant.base_price),
+        "sale_price": float(variant.sale_price) if variant.sale_price else None,
+        "stock": variant.stock,
+        "price": variant.price,
+        "option1_value": variant.option1_value,
+        "option2_value": variant.option2_value,
+        "option3_value": variant.option3_value,
+        "images": [legacy_image_dict(img) for img in variant.images],
+        "created_at": variant.created_at.isoformat() if variant.created_at else None,
+        "updated_at": variant.updated_at.isoformat() if variant.updated_at else None,
+    }
+
+def legacy_product_dict(product: Product) -> Dict[str, Any]:
+    """The per-field to_dict that predates compile_serializer and OrjsonProvider."""
+    return {
+        "id": product.id,
+        "name": product.name,
+        "slug": product.slug,
+        "description": product.description,
+        "benefits": product.benefits,
+        "ingredients": product.ingredients,
+        "instructions": product.instructions,
+        "is_active": product.is_active,
+        "is_featured": product.is_featured,
+        "meta_title": product.meta_title,
+        "meta_description": product.meta_description,
+        "weight": float(product.weight) if product.weight else None,
+        "dimensions": {
+            "width": float(product.width) if product.width else None,
+            "height": float(product.height) if product.height else None,
+            "length": float(product.length) if product.length else None,
+        } if product.width or product.height or product.length else None,
+        "option1_name": product.option1_name,
+        "option2_name": product.option2_name,
+        "option3_name": product.option3_name,
+        "category_id": product.category_id,
+        "category_name": product.category.name if product.category else None,
+        "category_slug": product.category.slug if product.category else None,
+        "average_rating": float(product.average_rating),
+        "review_count": product.review_count,
+        "total_stock": float(product.total_stock),
+        "display_price": float(product.display_price),
+        "base_price": float(product.base_price),
+        "sale_price": float(product.sale_price),
+        "stock": float(product.stock),
+        "variants": [legacy_variant_dict(variant) for variant in product.variants],
+        "images": [legacy_image_dict(img) for img in product.images],
+        "reviews": [legacy_review_dict(review) for review in product.reviews],
+        "created_at": product.created_at.isoformat() if product.created_at else None,
+        "updated_at": product.updated_at.isoformat() if product.updated_at else None,
+    }
+
+def main(number: int = 20) -> None:
+    app = Flask(__name__)
+    products = build_products()
+    providers = {'default': DefaultJSONProvider(app), 'orjson': OrjsonProvider(app)}
+    with app.app_context():
+        legacy_build = timeit.timeit(lambda: [legacy_product_dict(product) for product in products], number=number) / number
+        legacy_page = [legacy_product_dict(product) for product in products]
+        legacy_encode = timeit.timeit(lambda: providers['default'].dumps(legacy_page), number=number) / number
+        print(f'{"baseline":<10} {legacy_build * 1000:8.2f} ms build, {legacy_encode * 1000:8.2f} ms encode, {(legacy_build + legacy_encode) * 1000:8.2f} ms total')
+        build = timeit.timeit(lambda: [product.to_dict() for product in products], number=number) / number
+        page = [product.to_dict() for product in products]
+        for name, provider in providers.items():
+            encode = timeit.timeit(lambda: provider.dumps(page), number=number) / number
+            print(f'{name:<10} {build * 1000:8.2f} ms build, {encode * 1000:8.2f} ms encode, {(build + encode) * 1000:8.2f} ms total')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+@click.command('build-recommendations')
+@click.option('--per-product', type=int, default=None, help='Number of recommendations kept for each product.')
+@with_appcontext
+def build_recommendations_command(per_product):
+    from services.recommendation import RecommendationService
+    per_product = per_product if per_product is not None else current_app.config['RECOMMENDATIONS_PER_PRODUCT']
+    run = RecommendationService().build_recommendations(per_product)
+    click.echo(f'Processed {run.processed_orders} paid orders, updated {run.updated_pairs} pairs, pruned {run.pruned_pairs} pairs.')
+
+@click.command('compact-carts')
+@click.option('--ttl-days', type=int, default=None, help='Delete anonymous carts idle for longer than this many days.')
+@click.option('--batch-size', type=int, default=None, help='Number of carts deleted per transaction.')
+@with_appcontext
+def compact_carts_command(ttl_days, batch_size):
+    from services.cart import CartService
+    ttl_days = ttl_days if ttl_days is not None else current_app.config['CART_TTL_DAYS']
+    batch_size = batch_size if batch_size is not None else current_app.config['CART_COMPACTION_BATCH_SIZE']
+    started_at = time.perf_counter()
+    deleted = CartService().delete_abandoned_carts(ttl_days, batch_size)
+    click.echo(f'Deleted {deleted} carts idle for more than {ttl_days} days in {time.perf_counter() - started_at:.2f}s.')
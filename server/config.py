@@ -30,6 +30,10 @@ class Configuration(object):
 
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
+    CART_TTL_DAYS = int(os.getenv("CART_TTL_DAYS", "30"))
+    CART_COMPACTION_BATCH_SIZE = int(os.getenv("CART_COMPACTION_BATCH_SIZE", "1000"))
+    RECOMMENDATIONS_PER_PRODUCT = int(os.getenv("RECOMMENDATIONS_PER_PRODUCT", "20"))
+
     XENDIT_API_KEY = os.getenv("XENDIT_API_KEY")
     XENDIT_WEBHOOK_TOKEN = os.getenv("XENDIT_WEBHOOK_TOKEN")
     XENDIT_BASE_URL = os.getenv("XENDIT_BASE_URL", "https://api.xendit.co")
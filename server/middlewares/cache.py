@@ -0,0 +1,27 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from werkzeug.http import is_resource_modified
+
+from utils import get_last_modified
+
+def conditional_get(get_version):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            version = get_version(*args, **kwargs)
+            last_modified = get_last_modified(version)
+            etag = hashlib.md5(repr((version, request.full_path)).encode()).hexdigest()
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
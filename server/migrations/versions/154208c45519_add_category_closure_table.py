@@ -0,0 +1,48 @@
+"""Add category closure table
+
+Revision ID: 154208c45519
+Revises: df5346f0dacf
+Create Date: 2026-10-18 17:42:09.518306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '154208c45519'
+down_revision = 'df5346f0dacf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    with op.batch_alter_table('category_closure', schema=None) as batch_op:
+        batch_op.create_index('ix_category_closure_descendant_id_depth', ['descendant_id', 'depth'], unique=False)
+
+    op.execute("""
+        WITH RECURSIVE category_paths(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM categories
+            UNION ALL
+            SELECT category_paths.ancestor_id, categories.id, category_paths.depth + 1
+            FROM categories
+            JOIN category_paths ON categories.parent_category_id = category_paths.descendant_id
+        )
+        INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM category_paths
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('category_closure', schema=None) as batch_op:
+        batch_op.drop_index('ix_category_closure_descendant_id_depth')
+
+    op.drop_table('category_closure')
@@ -0,0 +1,40 @@
+"""Add cart indexes and cascade cart items
+
+Revision ID: 21248f049bb2
+Revises: 154208c45519
+Create Date: 2026-10-18 19:26:47.803115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '21248f049bb2'
+down_revision = '154208c45519'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.create_index('ix_carts_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_carts_session_id', ['session_id'], unique=False)
+        batch_op.create_index('ix_carts_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.create_index('ix_cart_items_cart_id', ['cart_id'], unique=False)
+        batch_op.drop_constraint('cart_items_cart_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('cart_items_cart_id_fkey', 'carts', ['cart_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.drop_constraint('cart_items_cart_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('cart_items_cart_id_fkey', 'carts', ['cart_id'], ['id'])
+        batch_op.drop_index('ix_cart_items_cart_id')
+
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.drop_index('ix_carts_updated_at')
+        batch_op.drop_index('ix_carts_session_id')
+        batch_op.drop_index('ix_carts_user_id')
@@ -0,0 +1,45 @@
+"""Add unique cart item product variant
+
+Revision ID: 78ba1a594abf
+Revises: 21248f049bb2
+Create Date: 2026-10-18 20:51:13.660472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '78ba1a594abf'
+down_revision = '21248f049bb2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE cart_items
+        SET quantity = duplicates.quantity
+        FROM (
+            SELECT min(id) AS id, sum(quantity) AS quantity
+            FROM cart_items
+            GROUP BY cart_id, product_id, variant_id
+            HAVING count(*) > 1
+        ) AS duplicates
+        WHERE cart_items.id = duplicates.id
+    """)
+    op.execute("""
+        DELETE FROM cart_items
+        WHERE id NOT IN (
+            SELECT min(id) FROM cart_items GROUP BY cart_id, product_id, variant_id
+        )
+    """)
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_cart_item_product_variant', ['cart_id', 'product_id', 'variant_id'], postgresql_nulls_not_distinct=True)
+        batch_op.drop_index('ix_cart_items_cart_id')
+
+
+def downgrade():
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.create_index('ix_cart_items_cart_id', ['cart_id'], unique=False)
+        batch_op.drop_constraint('uq_cart_item_product_variant', type_='unique')
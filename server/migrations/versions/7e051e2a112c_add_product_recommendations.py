@@ -0,0 +1,50 @@
+"""Add product recommendations
+
+Revision ID: 7e051e2a112c
+Revises: f63ddb36364b
+Create Date: 2026-10-18 15:08:31.274905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e051e2a112c'
+down_revision = 'f63ddb36364b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recommendation_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('last_order_id', sa.Integer(), nullable=False),
+    sa.Column('processed_orders', sa.Integer(), nullable=False),
+    sa.Column('updated_pairs', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('product_recommendations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('recommended_product_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['recommended_product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id', 'recommended_product_id', name='uq_product_recommendation')
+    )
+    with op.batch_alter_table('product_recommendations', schema=None) as batch_op:
+        batch_op.create_index('ix_product_recommendations_product_id_score', ['product_id', 'score'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('product_recommendations', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_recommendations_product_id_score')
+
+    op.drop_table('product_recommendations')
+    op.drop_table('recommendation_runs')
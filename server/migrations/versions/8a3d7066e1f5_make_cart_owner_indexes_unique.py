@@ -0,0 +1,57 @@
+"""Make cart owner indexes unique
+
+Revision ID: 8a3d7066e1f5
+Revises: d696fa6fdd5a
+Create Date: 2026-10-18 23:02:26.815340
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a3d7066e1f5'
+down_revision = 'd696fa6fdd5a'
+branch_labels = None
+depends_on = None
+
+
+def merge_duplicate_carts(column, condition='TRUE'):
+    duplicates = f"""
+        SELECT id, min(id) OVER (PARTITION BY {column}) AS keeper_id
+        FROM carts
+        WHERE {column} IS NOT NULL AND {condition}
+    """
+    op.execute(f"""
+        INSERT INTO cart_items (cart_id, product_id, variant_id, quantity)
+        SELECT duplicates.keeper_id, cart_items.product_id, cart_items.variant_id, sum(cart_items.quantity)
+        FROM cart_items
+        JOIN ({duplicates}) AS duplicates ON duplicates.id = cart_items.cart_id
+        WHERE duplicates.id != duplicates.keeper_id
+        GROUP BY duplicates.keeper_id, cart_items.product_id, cart_items.variant_id
+        ON CONFLICT ON CONSTRAINT uq_cart_item_product_variant
+        DO UPDATE SET quantity = cart_items.quantity + excluded.quantity, updated_at = now()
+    """)
+    op.execute(f"""
+        DELETE FROM carts
+        WHERE id IN (SELECT id FROM ({duplicates}) AS duplicates WHERE id != keeper_id)
+    """)
+
+
+def upgrade():
+    op.execute("UPDATE carts SET session_id = NULL WHERE user_id IS NOT NULL")
+    merge_duplicate_carts('user_id')
+    merge_duplicate_carts('session_id', 'user_id IS NULL')
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.drop_index('ix_carts_session_id')
+        batch_op.drop_index('ix_carts_user_id')
+        batch_op.create_index('ix_carts_user_id', ['user_id'], unique=True, postgresql_where=sa.text('user_id IS NOT NULL'))
+        batch_op.create_index('ix_carts_session_id', ['session_id'], unique=True, postgresql_where=sa.text('session_id IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.drop_index('ix_carts_session_id', postgresql_where=sa.text('session_id IS NOT NULL'))
+        batch_op.drop_index('ix_carts_user_id', postgresql_where=sa.text('user_id IS NOT NULL'))
+        batch_op.create_index('ix_carts_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_carts_session_id', ['session_id'], unique=False)
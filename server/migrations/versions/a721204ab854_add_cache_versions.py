@@ -0,0 +1,30 @@
+"""Add cache versions
+
+Revision ID: a721204ab854
+Revises: 78ba1a594abf
+Create Date: 2026-10-18 22:04:37.118260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a721204ab854'
+down_revision = '78ba1a594abf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='1', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("INSERT INTO cache_versions (name) VALUES ('catalog')")
+
+
+def downgrade():
+    op.drop_table('cache_versions')
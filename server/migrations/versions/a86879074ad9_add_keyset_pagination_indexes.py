@@ -0,0 +1,52 @@
+"""Add keyset pagination indexes
+
+Revision ID: a86879074ad9
+Revises: ec3440505929
+Create Date: 2026-10-18 11:40:05.213664
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a86879074ad9'
+down_revision = 'ec3440505929'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_products_display_price_id', ['display_price', 'id'], unique=False)
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_orders_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('ix_payments_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_payments_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.create_index('ix_reviews_rating_id', ['rating', 'id'], unique=False)
+        batch_op.create_index('ix_reviews_product_id_rating_id', ['product_id', 'rating', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.drop_index('ix_reviews_product_id_rating_id')
+        batch_op.drop_index('ix_reviews_rating_id')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_user_id_created_at_id')
+        batch_op.drop_index('ix_payments_created_at_id')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_user_id_created_at_id')
+        batch_op.drop_index('ix_orders_created_at_id')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_display_price_id')
+        batch_op.drop_index('ix_products_created_at_id')
@@ -0,0 +1,48 @@
+"""Count paid orders in recommendations
+
+Revision ID: d696fa6fdd5a
+Revises: a721204ab854
+Create Date: 2026-10-18 22:41:09.538112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd696fa6fdd5a'
+down_revision = 'a721204ab854'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recommended_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.execute("""
+        UPDATE orders
+        SET recommended_at = now()
+        WHERE status != 'cancelled'
+        AND id <= (SELECT coalesce(max(last_order_id), 0) FROM recommendation_runs)
+    """)
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_orders_pending_recommendation', ['id'], unique=False,
+            postgresql_where=sa.text("recommended_at IS NULL AND status IN ('processing', 'shipped', 'delivered', 'completed')")
+        )
+
+    with op.batch_alter_table('recommendation_runs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pruned_pairs', sa.Integer(), server_default='0', nullable=False))
+        batch_op.drop_column('last_order_id')
+
+
+def downgrade():
+    with op.batch_alter_table('recommendation_runs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_order_id', sa.Integer(), server_default='0', nullable=False))
+        batch_op.drop_column('pruned_pairs')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_pending_recommendation', postgresql_where=sa.text("recommended_at IS NULL AND status IN ('processing', 'shipped', 'delivered', 'completed')"))
+        batch_op.drop_column('recommended_at')
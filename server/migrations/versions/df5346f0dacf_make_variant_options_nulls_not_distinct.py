@@ -0,0 +1,28 @@
+"""Make variant options unique with nulls not distinct
+
+Revision ID: df5346f0dacf
+Revises: 7e051e2a112c
+Create Date: 2026-10-18 16:12:44.508127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'df5346f0dacf'
+down_revision = '7e051e2a112c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('product_variants', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_product_variant_options', type_='unique')
+        batch_op.create_unique_constraint('uq_product_variant_options', ['product_id', 'option1_value', 'option2_value', 'option3_value'], postgresql_nulls_not_distinct=True)
+
+
+def downgrade():
+    with op.batch_alter_table('product_variants', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_product_variant_options', type_='unique')
+        batch_op.create_unique_constraint('uq_product_variant_options', ['product_id', 'option1_value', 'option2_value', 'option3_value'])
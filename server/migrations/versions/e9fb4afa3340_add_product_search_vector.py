@@ -0,0 +1,39 @@
+"""Add product search vector
+
+Revision ID: e9fb4afa3340
+Revises: a86879074ad9
+Create Date: 2026-10-18 13:05:47.908114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9fb4afa3340'
+down_revision = 'a86879074ad9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(benefits, '') || ' ' || coalesce(ingredients, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'C')",
+                persisted=True
+            ),
+            nullable=True
+        ))
+        batch_op.create_index('ix_products_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_search_vector', postgresql_using='gin')
+        batch_op.drop_column('search_vector')
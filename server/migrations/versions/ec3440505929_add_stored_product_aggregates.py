@@ -0,0 +1,66 @@
+"""Add stored product aggregates
+
+Revision ID: ec3440505929
+Revises: e82e1dd483c6
+Create Date: 2026-10-18 09:12:31.482907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ec3440505929'
+down_revision = 'e82e1dd483c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('average_rating', sa.Numeric(precision=3, scale=2), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('review_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('total_stock', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('display_price', sa.Numeric(precision=10, scale=2), server_default='0', nullable=False))
+
+    op.execute("""
+        UPDATE products SET
+            average_rating = (
+                SELECT COALESCE(AVG(reviews.rating), 0) FROM reviews WHERE reviews.product_id = products.id
+            ),
+            review_count = (
+                SELECT COUNT(reviews.id) FROM reviews WHERE reviews.product_id = products.id
+            ),
+            total_stock = CASE
+                WHEN EXISTS (SELECT 1 FROM product_variants WHERE product_variants.product_id = products.id)
+                THEN (SELECT COALESCE(SUM(product_variants.stock), 0) FROM product_variants WHERE product_variants.product_id = products.id)
+                ELSE COALESCE(products.stock, 0)
+            END,
+            display_price = CASE
+                WHEN EXISTS (SELECT 1 FROM product_variants WHERE product_variants.product_id = products.id)
+                THEN (
+                    SELECT CASE
+                        WHEN product_variants.sale_price IS NOT NULL AND product_variants.sale_price > 0 THEN product_variants.sale_price
+                        ELSE COALESCE(product_variants.base_price, 0)
+                    END
+                    FROM product_variants
+                    WHERE product_variants.product_id = products.id
+                    ORDER BY product_variants.id
+                    LIMIT 1
+                )
+                WHEN products.sale_price IS NOT NULL AND products.sale_price > 0 THEN products.sale_price
+                ELSE COALESCE(products.base_price, 0)
+            END
+    """)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_average_rating'), ['average_rating'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_average_rating'))
+        batch_op.drop_column('display_price')
+        batch_op.drop_column('total_stock')
+        batch_op.drop_column('review_count')
+        batch_op.drop_column('average_rating')
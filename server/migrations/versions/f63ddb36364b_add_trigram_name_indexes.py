@@ -0,0 +1,33 @@
+"""Add trigram name indexes
+
+Revision ID: f63ddb36364b
+Revises: e9fb4afa3340
+Create Date: 2026-10-18 14:22:10.615392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f63ddb36364b'
+down_revision = 'e9fb4afa3340'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_name_trgm', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.create_index('ix_categories_name_trgm', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.drop_index('ix_categories_name_trgm', postgresql_using='gin')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_name_trgm', postgresql_using='gin')
@@ -2,7 +2,7 @@ from typing import Optional, Dict, Any
 from sqlalchemy import ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
 
 class Address(Base, TimestampMixin):
     __tablename__ = "addresses"
@@ -22,15 +22,7 @@ class Address(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<Address {self.id}>'
     
+    _serialize_fields = compile_serializer('id', 'type', 'line_1', 'line_2', 'city', 'zip_code', 'country', 'created_at', 'updated_at')
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            'id': self.id,
-            'type': self.type,
-            'line_1': self.line_1,
-            'line_2': self.line_2,
-            'city': self.city,
-            'zip_code': self.zip_code,
-            'country': self.country,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        return self._serialize_fields()
\ No newline at end of file
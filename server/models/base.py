@@ -1,8 +1,25 @@
 from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Optional, Set
 from sqlalchemy import DateTime, func
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+@lru_cache(maxsize=256)
+def compile_serializer(*fields: str) -> Callable[..., Dict[str, Any]]:
+    get_loaded = itemgetter(*fields)
+    get_attributes = attrgetter(*fields)
+    def serialize(instance: Any, only: Optional[Set[str]] = None) -> Dict[str, Any]:
+        if only is not None:
+            selected = [field for field in fields if field in only]
+            return compile_serializer(*selected)(instance) if selected else {}
+        try:
+            values = get_loaded(instance.__dict__)
+        except KeyError:
+            values = get_attributes(instance)
+        return dict(zip(fields, values)) if len(fields) > 1 else {fields[0]: values}
+    return serialize
 
 class Base(DeclarativeBase):
     pass
@@ -0,0 +1,51 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, String, event, func
+from sqlalchemy.orm import Mapped, Session, mapped_column
+from sqlalchemy.dialects.postgresql import insert
+
+from models.base import Base
+
+CATALOG_VERSION = 'catalog'
+CATALOG_TABLES = frozenset({
+    'products', 'product_variants', 'product_images', 'reviews',
+    'categories', 'category_images', 'category_closure', 'product_recommendations',
+})
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=1, server_default="1", nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f'<CacheVersion {self.name} ({self.version})>'
+
+def touches_catalog(instances) -> bool:
+    return any(getattr(instance, '__tablename__', None) in CATALOG_TABLES for instance in instances)
+
+@event.listens_for(Session, 'after_flush')
+def track_catalog_flush(session, flush_context):
+    if touches_catalog(session.new) or touches_catalog(session.dirty) or touches_catalog(session.deleted):
+        session.info['catalog_changed'] = True
+
+@event.listens_for(Session, 'do_orm_execute')
+def track_catalog_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) in CATALOG_TABLES:
+            orm_execute_state.session.info['catalog_changed'] = True
+
+@event.listens_for(Session, 'before_commit')
+def bump_catalog_version(session):
+    session.flush()
+    if session.info.pop('catalog_changed', False):
+        statement = insert(CacheVersion).values(name=CATALOG_VERSION, version=1)
+        session.connection().execute(statement.on_conflict_do_update(
+            index_elements=[CacheVersion.name],
+            set_={'version': CacheVersion.version + 1, 'updated_at': func.now()}
+        ))
+
+@event.listens_for(Session, 'after_soft_rollback')
+def reset_catalog_changes(session, previous_transaction):
+    session.info.pop('catalog_changed', None)
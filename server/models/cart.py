@@ -1,11 +1,16 @@
 from typing import List, Optional, Dict, Any
-from sqlalchemy import ForeignKey, String, Integer
+from sqlalchemy import ForeignKey, String, Integer, Index, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
 
 class Cart(Base, TimestampMixin):
     __tablename__ = "carts"
+    __table_args__ = (
+        Index('ix_carts_user_id', 'user_id', unique=True, postgresql_where=text('user_id IS NOT NULL')),
+        Index('ix_carts_session_id', 'session_id', unique=True, postgresql_where=text('session_id IS NOT NULL')),
+        Index('ix_carts_updated_at', 'updated_at'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
@@ -21,22 +26,23 @@ class Cart(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<Cart {self.id}>'
     
+    _serialize_fields = compile_serializer('id', 'user_id', 'session_id', 'created_at', 'updated_at')
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "session_id": self.session_id,
-            "subtotal": self.subtotal,
-            "items": [item.to_dict() for item in self.items],
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+        data = self._serialize_fields()
+        data["subtotal"] = self.subtotal
+        data["items"] = [item.to_dict() for item in self.items]
+        return data
 
 class CartItem(Base, TimestampMixin):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        UniqueConstraint('cart_id', 'product_id', 'variant_id',
+                        name='uq_cart_item_product_variant', postgresql_nulls_not_distinct=True),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    cart_id: Mapped[int] = mapped_column(ForeignKey("carts.id"), nullable=False)
+    cart_id: Mapped[int] = mapped_column(ForeignKey("carts.id", ondelete="CASCADE"), nullable=False)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
     variant_id: Mapped[int] = mapped_column(ForeignKey("product_variants.id"), nullable=True)
 
@@ -61,18 +67,13 @@ class CartItem(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<CartItem {self.product.name} ({self.quantity})>'
     
+    _serialize_fields = compile_serializer('id', 'cart_id', 'product_id', 'variant_id', 'quantity', 'created_at', 'updated_at')
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "cart_id": self.cart_id,
-            "product_id": self.product_id,
-            "variant_id": self.variant_id,
-            "quantity": self.quantity,
-            "price": self.price,
-            "subtotal": self.subtotal,
-            "in_stock": self.in_stock,
-            "product": self.product.to_dict() if self.product else None,
-            "variant": self.variant.to_dict() if self.variant else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
\ No newline at end of file
+        data = self._serialize_fields()
+        data["price"] = self.price
+        data["subtotal"] = self.subtotal
+        data["in_stock"] = self.in_stock
+        data["product"] = self.product.to_dict() if self.product else None
+        data["variant"] = self.variant.to_dict() if self.variant else None
+        return data
\ No newline at end of file
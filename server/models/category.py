@@ -1,11 +1,14 @@
-from typing import  List, Optional, Dict, Any
-from sqlalchemy import ForeignKey, String, Text
+from typing import  List, Optional, Dict, Any, Set
+from sqlalchemy import ForeignKey, Integer, String, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
 
 class Category(Base, TimestampMixin):
     __tablename__ = "categories"
+    __table_args__ = (
+        Index('ix_categories_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     parent_category_id: Mapped[Optional[int]] = mapped_column(ForeignKey("categories.id"))
@@ -22,19 +25,17 @@ class Category(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<Category {self.name}>'
     
-    def to_dict(self, include_subcategories=False) -> Dict[str, Any]:
-        data = {
-            'id': self.id,
-            'parent_category_id': self.parent_category_id,
-            'name': self.name,
-            'description': self.description,
-            'slug': self.slug,
-            'image': self.image.to_dict() if self.image else None,
-            'product_count': len(self.products) + sum(len(subcategory.products) for subcategory in self.subcategories),
-        }
+    _serialize_fields = compile_serializer('id', 'parent_category_id', 'name', 'description', 'slug')
+
+    def to_dict(self, include_subcategories=False, fields: Optional[Set[str]] = None, product_counts: Optional[Dict[int, int]] = None) -> Dict[str, Any]:
+        data = self._serialize_fields(fields)
+        if fields is None or 'image' in fields:
+            data['image'] = self.image.to_dict() if self.image else None
+        if fields is None or 'product_count' in fields:
+            data['product_count'] = product_counts.get(self.id, 0) if product_counts else 0
         if include_subcategories:
             subcategories = self.subcategories if self.subcategories is not None else []
-            data['subcategories'] = [subcategory.to_dict(True) for subcategory in subcategories]
+            data['subcategories'] = [subcategory.to_dict(True, fields, product_counts) for subcategory in subcategories]
         return data
     
 class CategoryImage(Base, TimestampMixin):
@@ -50,11 +51,21 @@ class CategoryImage(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<CategoryImage {self.url}>'
     
+    _serialize_fields = compile_serializer('id', 'category_id', 'url', 'created_at', 'updated_at')
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "category_id": self.category_id,
-            "url": self.url,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+        return self._serialize_fields()
+
+class CategoryClosure(Base):
+    __tablename__ = "category_closure"
+    __table_args__ = (
+        Index('ix_category_closure_descendant_id_depth', 'descendant_id', 'depth'),
+    )
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f'<CategoryClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>'
@@ -1,13 +1,24 @@
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Set
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy import ForeignKey, String, Integer, Numeric
+from sqlalchemy import DateTime, ForeignKey, String, Integer, Numeric, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
+
+PAID_ORDER_STATUSES = ('processing', 'shipped', 'delivered', 'completed')
 
 class Order(Base, TimestampMixin):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index('ix_orders_created_at_id', 'created_at', 'id'),
+        Index('ix_orders_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        Index(
+            'ix_orders_pending_recommendation', 'id',
+            postgresql_where=text(f"recommended_at IS NULL AND status IN {PAID_ORDER_STATUSES}")
+        ),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=True)
@@ -30,6 +41,7 @@ class Order(Base, TimestampMixin):
     shipping_cost: Mapped[float] = mapped_column(Numeric(10, 2), default=0, nullable=False)
     discount: Mapped[Optional[float]] = mapped_column(Numeric(10, 2), default=0)
     tracking_number: Mapped[Optional[str]] = mapped_column(String(255))
+    recommended_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
     user: Mapped["User"] = relationship(back_populates="orders")
     shipping_address: Mapped["Address"] = relationship(foreign_keys=[shipping_address_id])
@@ -44,29 +56,26 @@ class Order(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<Order {self.id}>'
     
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "shipping_address_id": self.shipping_address_id,
-            "billing_address_id": self.billing_address_id,
-            "payment_id": self.payment_id,
-            "status": self.status,
-            "shipping_method": self.shipping_method,
-            "total": float(self.total),
-            "subtotal": float(self.subtotal),
-            "tax": float(self.tax),
-            "shipping_cost": float(self.shipping_cost),
-            "discount": float(self.discount or 0),
-            "tracking_number": self.tracking_number,
-            "items": [item.to_dict() for item in self.items],
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "user": self.user.to_dict() if self.user else None,
-            "shipping_address": self.shipping_address.to_dict() if self.shipping_address else None,
-            "billing_address": self.billing_address.to_dict() if self.billing_address else None,
-            "payment": self.payment.to_dict() if self.payment else None,
-        }
+    _serialize_fields = compile_serializer(
+        'id', 'user_id', 'shipping_address_id', 'billing_address_id', 'payment_id', 'status', 'shipping_method',
+        'total', 'subtotal', 'tax', 'shipping_cost', 'tracking_number', 'created_at', 'updated_at'
+    )
+
+    def to_dict(self, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        data = self._serialize_fields(fields)
+        if fields is None or "discount" in fields:
+            data["discount"] = self.discount or 0
+        if fields is None or "items" in fields:
+            data["items"] = [item.to_dict() for item in self.items]
+        if fields is None or "user" in fields:
+            data["user"] = self.user.to_dict() if self.user else None
+        if fields is None or "shipping_address" in fields:
+            data["shipping_address"] = self.shipping_address.to_dict() if self.shipping_address else None
+        if fields is None or "billing_address" in fields:
+            data["billing_address"] = self.billing_address.to_dict() if self.billing_address else None
+        if fields is None or "payment" in fields:
+            data["payment"] = self.payment.to_dict() if self.payment else None
+        return data
 
 class OrderItem(Base, TimestampMixin):
     __tablename__ = "order_items"
@@ -90,17 +99,11 @@ class OrderItem(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<OrderItem {self.product.name} ({self.quantity})>'
     
+    _serialize_fields = compile_serializer('id', 'order_id', 'product_id', 'variant_id', 'quantity', 'price', 'created_at', 'updated_at')
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "order_id": self.order_id,
-            "product_id": self.product_id,
-            "variant_id": self.variant_id,
-            "quantity": self.quantity,
-            "price": float(self.price),
-            "subtotal": float(self.subtotal),
-            "product": self.product.to_dict() if self.product else None,
-            "variant": self.variant.to_dict() if self.variant else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
\ No newline at end of file
+        data = self._serialize_fields()
+        data["subtotal"] = self.subtotal
+        data["product"] = self.product.to_dict() if self.product else None
+        data["variant"] = self.variant.to_dict() if self.variant else None
+        return data
\ No newline at end of file
@@ -1,12 +1,16 @@
 from datetime import datetime
 from typing import Dict, Any, Optional
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import DateTime, String, Numeric, ForeignKey, JSON
+from sqlalchemy import DateTime, String, Numeric, ForeignKey, JSON, Index
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
 
 class Payment(Base, TimestampMixin):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index('ix_payments_created_at_id', 'created_at', 'id'),
+        Index('ix_payments_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=True)
@@ -28,21 +32,12 @@ class Payment(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<Payment {self.id} {self.status}>'
     
+    _serialize_fields = compile_serializer(
+        'id', 'user_id', 'amount', 'currency', 'status', 'payment_method', 'reference_id', 'xendit_id', 'session_data',
+        'payment_request_id', 'payment_details', 'payment_date', 'created_at', 'updated_at'
+    )
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "amount": float(self.amount),
-            "currency": self.currency,
-            "status": self.status,
-            "payment_method": self.payment_method,
-            "reference_id": self.reference_id,
-            "xendit_id": self.xendit_id,
-            "session_data": self.session_data,
-            "payment_request_id": self.payment_request_id,
-            "payment_details": self.payment_details,
-            "user": self.user.to_dict() if self.user else None,
-            "payment_date": self.payment_date.isoformat() if self.payment_date else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
\ No newline at end of file
+        data = self._serialize_fields()
+        data["user"] = self.user.to_dict() if self.user else None
+        return data
\ No newline at end of file
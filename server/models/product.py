@@ -1,12 +1,20 @@
-from typing import List, Optional, Dict, Any
+import itertools
+from typing import List, Optional, Dict, Any, Set
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
-from sqlalchemy import ForeignKey, String, Text, Boolean, Numeric, Integer, func, select, case, UniqueConstraint
+from sqlalchemy import ForeignKey, String, Text, Boolean, Numeric, Integer, func, select, case, UniqueConstraint, Index, Computed
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
 
 class Product(Base, TimestampMixin):
     __tablename__ = "products"
+    __table_args__ = (
+        Index('ix_products_created_at_id', 'created_at', 'id'),
+        Index('ix_products_display_price_id', 'display_price', 'id'),
+        Index('ix_products_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_products_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
@@ -35,171 +43,160 @@ class Product(Base, TimestampMixin):
     sale_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 2), default=0)
     stock: Mapped[Optional[int]] = mapped_column(Integer, default=0)
 
+    average_rating: Mapped[float] = mapped_column(Numeric(3, 2), default=0, server_default="0", nullable=False, index=True)
+    review_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    total_stock: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    display_price: Mapped[float] = mapped_column(Numeric(10, 2), default=0, server_default="0", nullable=False)
+
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(benefits, '') || ' ' || coalesce(ingredients, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'C')",
+            persisted=True
+        ),
+        deferred=True
+    )
+
     category: Mapped["Category"] = relationship(back_populates="products")
-    images: Mapped[List["ProductImage"]] = relationship(back_populates="product", cascade="all, delete-orphan")
+    images: Mapped[List["ProductImage"]] = relationship(back_populates="product", cascade="all, delete-orphan", order_by="ProductImage.id")
     variants: Mapped[List["ProductVariant"]] = relationship(back_populates="product", cascade="all, delete-orphan")
     reviews: Mapped[List["Review"]] = relationship(back_populates="product", cascade="all, delete-orphan")
-        
-    @hybrid_property
-    def average_rating(self) -> float:
-        return sum(review.rating for review in self.reviews) / len(self.reviews) if self.reviews else 0
-    
-    @average_rating.expression
-    def average_rating(cls):
+
+    @classmethod
+    def aggregate_expressions(cls) -> Dict[str, Any]:
         from models.review import Review
-        return (
-            select(func.coalesce(func.avg(Review.rating), 0))
-            .where(Review.product_id == cls.id)
-            .correlate(cls)
+        variant_count = (
+            select(func.count(ProductVariant.id))
+            .where(ProductVariant.product_id == cls.id)
             .scalar_subquery()
         )
-    
-    @hybrid_property
-    def total_stock(self) -> int:
-        if self.variants:
-            return sum(variant.stock for variant in self.variants)
-        return self.stock or 0
-    
-    @total_stock.expression
-    def total_stock(cls):
-        return case(
-            [
-                (
-                    select(func.count(ProductVariant.id))
-                    .where(ProductVariant.product_id == cls.id)
-                    .correlate(cls)
-                    .scalar_subquery() > 0,
-                    select(func.coalesce(func.sum(ProductVariant.stock), 0))
-                    .where(ProductVariant.product_id == cls.id)
-                    .correlate(cls)
-                    .scalar_subquery()
-                )
-            ],
-            else_=func.coalesce(cls.stock, 0)
+        variant_stock = (
+            select(func.coalesce(func.sum(ProductVariant.stock), 0))
+            .where(ProductVariant.product_id == cls.id)
+            .scalar_subquery()
         )
-
-    @hybrid_property
-    def display_price(self) -> float:
-        if self.variants and len(self.variants) > 0:
-            variant = self.variants[0]
-            if variant.sale_price is not None and variant.sale_price > 0:
-                return variant.sale_price
-            return variant.base_price or 0
-        if self.sale_price is not None and self.sale_price > 0:
-            return self.sale_price 
-        return self.base_price or 0
-
-    @display_price.expression
-    def display_price(cls):
         first_variant_price = (
             select(
-                func.coalesce(
-                    case(
-                        (ProductVariant.sale_price.isnot(None) & (ProductVariant.sale_price > 0), 
-                        ProductVariant.sale_price),
-                        else_=func.coalesce(ProductVariant.base_price, 0)
-                    ),
-                    0
+                case(
+                    (ProductVariant.sale_price.isnot(None) & (ProductVariant.sale_price > 0), ProductVariant.sale_price),
+                    else_=func.coalesce(ProductVariant.base_price, 0)
                 )
             )
             .where(ProductVariant.product_id == cls.id)
             .order_by(ProductVariant.id)
             .limit(1)
-            .correlate(cls)
-            .scalar_subquery()
-        )
-        variant_count = (
-            select(func.count(ProductVariant.id))
-            .where(ProductVariant.product_id == cls.id)
-            .correlate(cls)
             .scalar_subquery()
         )
-        return case(
-            (variant_count > 0, first_variant_price),
-            (cls.sale_price.isnot(None) & (cls.sale_price > 0), cls.sale_price),
-            else_=func.coalesce(cls.base_price, 0)
-        )
+        return {
+            "average_rating": (
+                select(func.coalesce(func.avg(Review.rating), 0))
+                .where(Review.product_id == cls.id)
+                .scalar_subquery()
+            ),
+            "review_count": (
+                select(func.count(Review.id))
+                .where(Review.product_id == cls.id)
+                .scalar_subquery()
+            ),
+            "total_stock": case(
+                (variant_count > 0, variant_stock),
+                else_=func.coalesce(cls.stock, 0)
+            ),
+            "display_price": case(
+                (variant_count > 0, first_variant_price),
+                (cls.sale_price.isnot(None) & (cls.sale_price > 0), cls.sale_price),
+                else_=func.coalesce(cls.base_price, 0)
+            ),
+        }
     
-    def get_product_options(self) -> Dict[str, List[str]]:
-        options = {}
+    def build_option_index(self) -> Dict[str, Any]:
+        positions = {}
         for i in range(1, 4):
             option_name = getattr(self, f'option{i}_name')
             if option_name:
-                values = set()
-                for variant in self.variants:
-                    value = getattr(variant, f'option{i}_value')
-                    if value:
-                        values.add(value)
-                options[option_name] = sorted(list(values))
-        return options
+                positions[option_name] = i
+        options = {option_name: set() for option_name in positions}
+        variants = {}
+        for variant in self.variants:
+            values = (variant.option1_value or None, variant.option2_value or None, variant.option3_value or None)
+            for option_name, position in positions.items():
+                if values[position - 1]:
+                    options[option_name].add(values[position - 1])
+            entry = {"id": variant.id, "price": float(variant.price), "stock": variant.stock}
+            for key in itertools.product(*[(value, None) if value else (None,) for value in values]):
+                variants.setdefault(key, entry)
+        return {
+            "positions": positions,
+            "options": {option_name: sorted(values) for option_name, values in options.items()},
+            "variants": variants,
+        }
 
-    def find_variant_by_options(self, option_values: Dict[str, str]) -> Optional["ProductVariant"]:
-        option_positions = {}
-        for i in range(1, 4):
-            option_name = getattr(self, f'option{i}_name')
-            if option_name:
-                option_positions[option_name] = i
-        required_matches = set()
+    @staticmethod
+    def resolve_option_index(option_index: Dict[str, Any], option_values: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        key = [None, None, None]
         for option_name, option_value in option_values.items():
-            if option_name in option_positions:
-                position = option_positions[option_name]
-                required_matches.add((position, option_value))
-        for variant in self.variants:
-            variant_options = set()
-            for pos in range(1, 4):
-                value = getattr(variant, f'option{pos}_value')
-                if value:
-                    variant_options.add((pos, value))
-            if required_matches.issubset(variant_options):
-                return variant
-        return None
+            position = option_index["positions"].get(option_name)
+            if position:
+                key[position - 1] = option_value or None
+        return option_index["variants"].get(tuple(key))
+
+    def get_product_options(self) -> Dict[str, List[str]]:
+        return self.build_option_index()["options"]
+
+    def find_variant_by_options(self, option_values: Dict[str, str]) -> Optional["ProductVariant"]:
+        entry = self.resolve_option_index(self.build_option_index(), option_values)
+        if not entry:
+            return None
+        return next((variant for variant in self.variants if variant.id == entry["id"]), None)
     
     def __repr__(self) -> str:
         return f'<Product {self.name}>'
     
-    def to_dict(self, include_variants=True, include_images=True, include_reviews=True) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "name": self.name,
-            "slug": self.slug,
-            "description": self.description,
-            "benefits": self.benefits,
-            "ingredients": self.ingredients,
-            "instructions": self.instructions,
-            "is_active": self.is_active,
-            "is_featured": self.is_featured,
-            "meta_title": self.meta_title,
-            "meta_description": self.meta_description,
-            "weight": float(self.weight) if self.weight else None,
-            "dimensions": {
-                "width": float(self.width) if self.width else None,
-                "height": float(self.height) if self.height else None,
-                "length": float(self.length) if self.length else None,
-            } if self.width or self.height or self.length else None,
-            "option1_name": self.option1_name,
-            "option2_name": self.option2_name,
-            "option3_name": self.option3_name,
-            "category_id": self.category_id,
-            "category_name": self.category.name if self.category else None,
-            "category_slug": self.category.slug if self.category else None,
-            "average_rating": self.average_rating,
-            "total_stock": float(self.total_stock),
-            "display_price": float(self.display_price),
-            "base_price": float(self.base_price),
-            "sale_price": float(self.sale_price),
-            "stock": float(self.stock),
-            "variants": [variant.to_dict() for variant in self.variants] if include_variants else None,
-            "images": [img.to_dict() for img in self.images] if include_images else None,
-            "reviews": [review.to_dict() for review in self.reviews] if include_reviews else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+    _serialize_fields = compile_serializer(
+        'id', 'name', 'slug', 'description', 'benefits', 'ingredients', 'instructions', 'is_active', 'is_featured',
+        'meta_title', 'meta_description', 'option1_name', 'option2_name', 'option3_name', 'category_id',
+        'average_rating', 'review_count', 'total_stock', 'display_price', 'base_price', 'sale_price', 'stock',
+        'created_at', 'updated_at'
+    )
+    _serialize_card_fields = compile_serializer('id', 'name', 'slug', 'is_active', 'is_featured', 'display_price', 'average_rating', 'review_count')
+
+    def to_dict(self, include_variants=True, include_images=True, include_reviews=True, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        data = self._serialize_fields(fields)
+        if fields is not None:
+            include_variants, include_images, include_reviews = 'variants' in fields, 'images' in fields, 'reviews' in fields
+        if fields is None or "weight" in fields:
+            data["weight"] = self.weight or None
+        if fields is None or "dimensions" in fields:
+            data["dimensions"] = {
+                "width": self.width or None,
+                "height": self.height or None,
+                "length": self.length or None,
+            } if self.width or self.height or self.length else None
+        if fields is None or "category_name" in fields or "category_slug" in fields:
+            category = self.category
+            data["category_name"] = category.name if category else None
+            data["category_slug"] = category.slug if category else None
+        if fields is None or include_variants:
+            data["variants"] = [variant.to_dict() for variant in self.variants] if include_variants else None
+        if fields is None or include_images:
+            data["images"] = [img.to_dict() for img in self.images] if include_images else None
+        if fields is None or include_reviews:
+            data["reviews"] = [review.to_dict() for review in self.reviews] if include_reviews else None
+        return data
+
+    def to_card_dict(self) -> Dict[str, Any]:
+        data = self._serialize_card_fields()
+        data["image"] = self.images[0].url if self.images else None
+        data["in_stock"] = self.total_stock > 0
+        return data
 
 class ProductVariant(Base, TimestampMixin):
     __tablename__ = "product_variants"
     __table_args__ = (
         UniqueConstraint('product_id', 'option1_value', 'option2_value', 'option3_value', 
-                        name='uq_product_variant_options'),
+                        name='uq_product_variant_options', postgresql_nulls_not_distinct=True),
     )
     
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -224,7 +221,7 @@ class ProductVariant(Base, TimestampMixin):
     @price.expression
     def price(cls):
         return case(
-            (cls.sale_price != None, cls.sale_price),
+            (cls.sale_price > 0, cls.sale_price),
             else_=cls.base_price
         )
 
@@ -244,23 +241,18 @@ class ProductVariant(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<ProductVariant {self.name}>'
     
+    _serialize_fields = compile_serializer(
+        'id', 'product_id', 'name', 'base_price', 'stock',
+        'option1_value', 'option2_value', 'option3_value', 'created_at', 'updated_at'
+    )
+
     def to_dict(self, include_images=True) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "product_id": self.product_id,
-            "name": self.name,
-            "base_price": float(self.base_price),
-            "sale_price": float(self.sale_price) if self.sale_price else None,
-            "stock": self.stock,
-            "price": self.price,
-            "option1_value": self.option1_value,
-            "option2_value": self.option2_value,
-            "option3_value": self.option3_value,
-            "images": [img.to_dict() for img in self.images] if include_images else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
-    
+        data = self._serialize_fields()
+        data["sale_price"] = self.sale_price or None
+        data["price"] = self.price
+        data["images"] = [img.to_dict() for img in self.images] if include_images else None
+        return data
+
 class ProductImage(Base, TimestampMixin):
     __tablename__ = "product_images"
     
@@ -276,12 +268,7 @@ class ProductImage(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<ProductImage {self.url}>'
     
+    _serialize_fields = compile_serializer('id', 'product_id', 'variant_id', 'url', 'created_at', 'updated_at')
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "product_id": self.product_id,
-            "variant_id": self.variant_id,
-            "url": self.url,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+        return self._serialize_fields()
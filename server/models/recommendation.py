@@ -0,0 +1,45 @@
+from typing import Dict, Any
+from sqlalchemy import ForeignKey, Integer, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from models.base import Base, TimestampMixin, compile_serializer
+
+class ProductRecommendation(Base, TimestampMixin):
+    __tablename__ = "product_recommendations"
+    __table_args__ = (
+        UniqueConstraint('product_id', 'recommended_product_id', name='uq_product_recommendation'),
+        Index('ix_product_recommendations_product_id_score', 'product_id', 'score'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    recommended_product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+
+    score: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    recommended_product: Mapped["Product"] = relationship(foreign_keys=[recommended_product_id])
+
+    def __repr__(self) -> str:
+        return f'<ProductRecommendation {self.product_id} -> {self.recommended_product_id}>'
+
+    _serialize_fields = compile_serializer('id', 'product_id', 'recommended_product_id', 'score', 'created_at', 'updated_at')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._serialize_fields()
+
+class RecommendationRun(Base, TimestampMixin):
+    __tablename__ = "recommendation_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    processed_orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_pairs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    pruned_pairs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return f'<RecommendationRun {self.id} ({self.processed_orders})>'
+
+    _serialize_fields = compile_serializer('id', 'processed_orders', 'updated_pairs', 'pruned_pairs', 'created_at', 'updated_at')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._serialize_fields()
@@ -1,11 +1,15 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Text, ForeignKey, String, Integer, Boolean
+from sqlalchemy import Text, ForeignKey, String, Integer, Boolean, Index
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
 
 class Review(Base, TimestampMixin):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index('ix_reviews_rating_id', 'rating', 'id'),
+        Index('ix_reviews_product_id_rating_id', 'product_id', 'rating', 'id'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -23,17 +27,10 @@ class Review(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<Review {self.id}>'
     
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "product_id": self.product_id,
-            "rating": self.rating,
-            "title": self.title,
-            "content": self.content,
-            "is_verified": self.is_verified,
-            "is_approved": self.is_approved,
-            "user": self.user.to_dict() if self.user else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
\ No newline at end of file
+    _serialize_fields = compile_serializer('id', 'user_id', 'product_id', 'rating', 'title', 'content', 'is_verified', 'is_approved', 'created_at', 'updated_at')
+
+    def to_dict(self, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        data = self._serialize_fields(fields)
+        if fields is None or "user" in fields:
+            data["user"] = self.user.to_dict() if self.user else None
+        return data
\ No newline at end of file
@@ -2,7 +2,7 @@ from typing import Dict, Any
 from sqlalchemy import String, Boolean
 from sqlalchemy.orm import Mapped, mapped_column
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
 
 class Subscription(Base, TimestampMixin):
     __tablename__ = "subscriptions"
@@ -14,11 +14,7 @@ class Subscription(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f"<Subscription {self.email}>"
 
+    _serialize_fields = compile_serializer('id', 'email', 'is_active', 'created_at', 'updated_at')
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "email": self.email,
-            "is_active": self.is_active,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+        return self._serialize_fields()
@@ -3,7 +3,7 @@ from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from werkzeug.security import generate_password_hash, check_password_hash
 
-from models.base import Base, TimestampMixin
+from models.base import Base, TimestampMixin, compile_serializer
 
 class User(Base, TimestampMixin):
     __tablename__ = "users"
@@ -32,17 +32,9 @@ class User(Base, TimestampMixin):
     def __repr__(self) -> str:
         return f'<User {self.email}>'
     
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            'id': self.id,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'country_code': self.country_code,
-            'phone_number': self.phone_number,
-            'is_admin': self.is_admin,
-            "addresses": [address.to_dict() for address in self.addresses],
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    _serialize_fields = compile_serializer('id', 'email', 'first_name', 'last_name', 'country_code', 'phone_number', 'is_admin', 'created_at', 'updated_at')
 
+    def to_dict(self) -> Dict[str, Any]:
+        data = self._serialize_fields()
+        data['addresses'] = [address.to_dict() for address in self.addresses]
+        return data
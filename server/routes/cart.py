@@ -2,7 +2,7 @@ import uuid
 from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
-from services.cart import CartService
+from services.cart import CartService, CartConflictError, CART_BATCH_LIMIT
 
 cart_blueprint = Blueprint('cart', __name__, url_prefix='/cart')
 cart_service = CartService()
@@ -31,11 +31,19 @@ def get_response(cart):
         )
     return response
 
+def get_conflict_response(error):
+    response = jsonify({'message': str(error)})
+    response.delete_cookie('cart_session', httponly=True, samesite='Lax')
+    return response
+
 @cart_blueprint.route('/', methods=['GET'])
 def get_cart():
     user_id, session_id = get_cart_identifier()
     try:
-        cart = cart_service.get_cart(user_id, session_id)
+        if not user_id and g.new_session_id:
+            cart = cart_service.get_empty_cart(session_id=session_id)
+        else:
+            cart = cart_service.get_cart(user_id, session_id)
         return get_response(cart), 200
     except Exception as e:
         return jsonify({'message': f'Cart Fetch Failed: {str(e)}'}), 500
@@ -51,9 +59,33 @@ def add_to_cart():
         cart_service.add_to_cart(product_id, variant_id, quantity, user_id, session_id)
         cart = cart_service.get_cart(user_id, session_id)
         return get_response(cart), 200
+    except CartConflictError as e:
+        return get_conflict_response(e), 409
     except Exception as e:
         return jsonify({'message': f'Cart Item Addition Failed: {str(e)}'}), 500
 
+@cart_blueprint.route('/batch', methods=['POST'])
+def apply_cart_operations():
+    data = request.get_json() or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations or not all(isinstance(operation, dict) for operation in operations):
+        return jsonify({'message': 'Operations are required.'}), 400
+    if len(operations) > CART_BATCH_LIMIT:
+        return jsonify({'message': f'At most {CART_BATCH_LIMIT} cart operations can be applied at once.'}), 400
+    try:
+        user_id, session_id = get_cart_identifier()
+        cart, errors = cart_service.apply_cart_operations(operations, user_id, session_id)
+        if errors:
+            return jsonify({
+                'message': 'Cart could not be updated.',
+                'errors': errors
+            }), 400
+        return get_response(cart or cart_service.get_empty_cart(user_id, session_id)), 200
+    except CartConflictError as e:
+        return get_conflict_response(e), 409
+    except Exception as e:
+        return jsonify({'message': f'Cart Batch Update Failed: {str(e)}'}), 500
+
 @cart_blueprint.route('/<int:cart_item_id>', methods=['PUT', 'DELETE'])
 def update_cart_item(cart_item_id):
     user_id, session_id = get_cart_identifier()
@@ -1,21 +1,25 @@
 from flask import Blueprint, request, jsonify
 
+from utils import parse_fields, InvalidCursorError
 from middlewares.user import admin_required
+from middlewares.cache import conditional_get
 from services.category import CategoryService
+from services.product import ProductService
 
 category_blueprint = Blueprint('category', __name__, url_prefix='/categories')
 category_service = CategoryService()
+product_service = ProductService()
 
 @category_blueprint.route('/', methods=['GET'])
+@conditional_get(lambda: category_service.get_category_version())
 def get_categories():
     try:
         tree_format = request.args.get('tree', 'false').lower() == 'true'
+        fields = parse_fields(request.args.get('fields', type=str))
         if tree_format:
             categories = category_service.get_category_tree()
         else:
-            categories = [
-                category_service.serialize_category(category) for category in category_service.get_all_categories()
-            ]
+            categories = category_service.serialize_categories(category_service.get_all_categories(fields=fields), fields)
         return jsonify({
             'categories': categories
         }), 200
@@ -25,9 +29,11 @@ def get_categories():
         return jsonify({'message': f'Categories Fetch Failed: {str(e)}'}), 500
 
 @category_blueprint.route('/root', methods=['GET'])
+@conditional_get(lambda: category_service.get_category_version())
 def get_root_categories():
     try:
-        categories = [category_service.serialize_category(category) for category in category_service.get_all_categories(filters={"parent_category_id": None})]
+        fields = parse_fields(request.args.get('fields', type=str))
+        categories = category_service.serialize_categories(category_service.get_all_categories(filters={"parent_category_id": None}, fields=fields), fields)
         return jsonify({
             'categories': categories
         }), 200
@@ -35,6 +41,7 @@ def get_root_categories():
          return jsonify({'message': f'Root Categories Fetch Failed: {str(e)}'}), 500
 
 @category_blueprint.route('/<int:category_id>', methods=['GET'])
+@conditional_get(lambda category_id: category_service.get_category_version())
 def get_category(category_id):
     try:
         include_subcategories = request.args.get('include_subcategories', 'false').lower() == 'true'
@@ -52,6 +59,7 @@ def get_category(category_id):
         return jsonify({'message': f'Category Fetch Failed: {str(e)}'}), 500
     
 @category_blueprint.route('/slug/<slug>', methods=['GET'])
+@conditional_get(lambda slug: category_service.get_category_version())
 def get_category_by_slug(slug):
     category = category_service.get_category_by_slug(slug)
     if not category:
@@ -68,7 +76,24 @@ def get_category_by_slug(slug):
     except Exception as e:
         return jsonify({'message': f'Category Fetch Failed: {str(e)}'}), 500
     
+@category_blueprint.route('/slug/<slug>/products', methods=['GET'])
+@conditional_get(lambda slug: category_service.get_category_version())
+def get_category_products_by_slug(slug):
+    try:
+        category = category_service.get_category_with_subcategories_by_slug(slug)
+        if not category:
+            return jsonify({'message': 'Category could not be found.'}), 404
+        response = product_service.get_product_listing(request.args, category['id'])
+        response['category'] = category
+        response['breadcrumbs'] = category_service.get_category_breadcrumbs(category['id'])
+        return jsonify(response), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor.'}), 400
+    except Exception as e:
+        return jsonify({'message': f'Category Products Fetch Failed: {str(e)}'}), 500
+
 @category_blueprint.route('/<int:category_id>/breadcrumbs', methods=['GET'])
+@conditional_get(lambda category_id: category_service.get_category_version())
 def get_breadcrumbs(category_id):
     try:
         breadcrumbs = category_service.get_category_breadcrumbs(category_id)
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
+from utils import parse_fields, InvalidCursorError
 from services.user import UserService
 from services.order import OrderService
 from services.payment import PaymentService
@@ -18,15 +19,21 @@ def get_orders():
     status = request.args.get('status', type=str)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor', type=str)
+    include_count = request.args.get('include_count', 'true' if cursor is None else 'false').lower() == 'true'
+    fields = parse_fields(request.args.get('fields', type=str))
     try:
-        orders, count, total_pages = order_service.get_orders(page, per_page, user_id, status)
+        orders, count, total_pages, next_cursor = order_service.get_orders(page, per_page, user_id, status, cursor, include_count, fields)
         return jsonify({
-            'orders': [order_service.serialize_order(order) for order in orders],
+            'orders': [order_service.serialize_order(order, fields) for order in orders],
             'count': count,
             'total_pages': total_pages,
             'page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor.'}), 400
     except Exception as e:
         return jsonify({'message': f'Orders could not be fetched.'}), 500
     
@@ -36,15 +43,21 @@ def get_all_orders():
     status = request.args.get('status', type=str)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor', type=str)
+    include_count = request.args.get('include_count', 'true' if cursor is None else 'false').lower() == 'true'
+    fields = parse_fields(request.args.get('fields', type=str))
     try:
-        orders, count, total_pages = order_service.get_orders(page, per_page, None, status)
+        orders, count, total_pages, next_cursor = order_service.get_orders(page, per_page, None, status, cursor, include_count, fields)
         return jsonify({
-            'orders': [order_service.serialize_order(order) for order in orders],
+            'orders': [order_service.serialize_order(order, fields) for order in orders],
             'count': count,
             'total_pages': total_pages,
             'page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor.'}), 400
     except Exception as e:
         return jsonify({'message': f'Orders could not be fetched.'}), 500
 
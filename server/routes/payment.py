@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
+from utils import InvalidCursorError
 from services.user import UserService
 from services.payment import PaymentService
 from middlewares.user import admin_required, auth_required
@@ -14,6 +15,8 @@ user_service = UserService()
 def get_payments():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor', type=str)
+    include_count = request.args.get('include_count', 'true' if cursor is None else 'false').lower() == 'true'
     user_id = request.args.get('user_id', type=int)
     status = request.args.get('status', type=str)
     payment_method = request.args.get('payment_method', type=str)
@@ -25,14 +28,17 @@ def get_payments():
     if payment_method is not None:
         filters['payment_method'] = payment_method
     try:
-        payments, count, total_pages = payment_service.get_payments(page, per_page, filters)
+        payments, count, total_pages, next_cursor = payment_service.get_payments(page, per_page, filters, cursor, include_count)
         return jsonify({
             'payments': [payment_service.serialize_payment(payment) for payment in payments],
             'count': count,
             'total_pages': total_pages,
             'page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor.'}), 400
     except Exception as e:
         return jsonify({'message': f'Payments Fetch Failed: {str(e)}'}), 500
 
@@ -135,6 +141,8 @@ def get_user_payments():
     user_id = int(jwt_identity)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor', type=str)
+    include_count = request.args.get('include_count', 'true' if cursor is None else 'false').lower() == 'true'
     status = request.args.get('status', type=str)
     payment_method = request.args.get('payment_method', type=str)
     filters = {'user_id': user_id}
@@ -143,14 +151,17 @@ def get_user_payments():
     if payment_method is not None:
         filters['payment_method'] = payment_method
     try:
-        payments, count, total_pages = payment_service.get_payments(page, per_page, filters)
+        payments, count, total_pages, next_cursor = payment_service.get_payments(page, per_page, filters, cursor, include_count)
         return jsonify({
             'payments': [payment_service.serialize_payment(payment) for payment in payments],
             'count': count,
             'total_pages': total_pages,
             'page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor.'}), 400
     except Exception as e:
         return jsonify({'message': f'Payments Fetch Failed: {str(e)}'}), 500
     
@@ -1,70 +1,138 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 
-from services.product import ProductService
+from utils import parse_fields, InvalidCursorError
+from services.catalog import CatalogService
+from services.product import ProductService, BATCH_LIMIT, VARIANT_BULK_LIMIT
 from middlewares.user import admin_required
+from middlewares.cache import conditional_get
 
 product_blueprint = Blueprint('product', __name__, url_prefix='/products')
 product_service = ProductService()
+catalog_service = CatalogService()
 
 @product_blueprint.route('/', methods=['GET'])
+@conditional_get(lambda: product_service.get_catalog_version())
 def get_products():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    search = request.args.get('search', type=str)
-    sort = request.args.get('sort', type=str)
-    category_ids_str = request.args.get('category_ids', '')
-    category_ids = [int(cid) for cid in category_ids_str.split(',') if cid.strip()] if category_ids_str else []
-    is_featured = request.args.get('is_featured', type=bool)
-    is_active = request.args.get('is_active', True, type=bool)
-    filters = {'is_active': is_active}
-    if is_featured is not None:
-        filters['is_featured'] = is_featured
     try:
-        products, count, total_pages = product_service.get_all_products(page, per_page, category_ids, filters, search, sort)
+        return jsonify(product_service.get_product_listing(request.args)), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor.'}), 400
+    except Exception as e:
+        return jsonify({'message': f'Products Fetch Failed: {str(e)}'}), 500
+
+@product_blueprint.route('/suggest', methods=['GET'])
+def get_product_suggestions():
+    query = request.args.get('q', '', type=str)
+    limit = max(1, min(request.args.get('limit', 8, type=int), 20))
+    try:
         return jsonify({
-            'products': [product_service.serialize_product(product) for product in products],
-            'count': count,
-            'total_pages': total_pages,
-            'page': page,
-            'per_page': per_page
+            'suggestions': product_service.get_product_suggestions(query, limit)
         }), 200
     except Exception as e:
-        return jsonify({'message': f'Products Fetch Failed: {str(e)}'}), 500
+        return jsonify({'message': f'Product Suggestions Fetch Failed: {str(e)}'}), 500
 
+@product_blueprint.route('/batch', methods=['GET'])
+@conditional_get(lambda: product_service.get_catalog_version())
+def get_products_batch():
+    view = request.args.get('view', type=str)
+    ids_str = request.args.get('ids', '')
+    slugs_str = request.args.get('slugs', '')
+    try:
+        product_ids = [int(pid) for pid in ids_str.split(',') if pid.strip()] if ids_str else []
+    except ValueError:
+        return jsonify({'message': 'Product IDs must be integers.'}), 400
+    slugs = [slug.strip() for slug in slugs_str.split(',') if slug.strip()] if slugs_str else []
+    if not product_ids and not slugs:
+        return jsonify({'message': 'Product IDs or slugs are required.'}), 400
+    if len(product_ids) + len(slugs) > BATCH_LIMIT:
+        return jsonify({'message': f'At most {BATCH_LIMIT} products can be fetched at once.'}), 400
+    try:
+        products, missing_ids, missing_slugs = product_service.get_serialized_products(product_ids, slugs, view)
+        return jsonify({
+            'products': products,
+            'missing_ids': missing_ids,
+            'missing_slugs': missing_slugs
+        }), 200
+    except Exception as e:
+        return jsonify({'message': f'Products Fetch Failed: {str(e)}'}), 500
 
 @product_blueprint.route('/<int:product_id>', methods=['GET'])
+@conditional_get(lambda product_id: product_service.get_catalog_version())
 def get_product(product_id):
     try:
-        product = product_service.get_product_by_id(product_id)
+        product = product_service.get_serialized_product(product_id)
         if not product:
             return jsonify({'message': 'Product could not be found.'}), 404
         return jsonify({
-            'product': product_service.serialize_product(product)
+            'product': product
         }), 200
     except Exception as e:
         return jsonify({'message': f'Product Fetch Failed: {str(e)}'}), 500
 
 @product_blueprint.route('/slug/<string:slug>', methods=['GET'])
+@conditional_get(lambda slug: product_service.get_catalog_version())
 def get_product_by_slug(slug):
     try:
-        product = product_service.get_product_by_slug(slug)
+        product = product_service.get_serialized_product_by_slug(slug)
         if not product:
             return jsonify({'message': 'Product could not be found.'}), 404
         return jsonify({
-            'product': product_service.serialize_product(product)
+            'product': product
         }), 200
     except Exception as e:
         return jsonify({'message': f'Product Fetch Failed: {str(e)}'}), 500
 
+@product_blueprint.route('/cache-stats', methods=['GET'])
+@admin_required
+def get_product_cache_stats():
+    return jsonify({
+        'cache': product_service.get_product_cache_stats()
+    }), 200
+
+@product_blueprint.route('/import', methods=['POST'])
+@admin_required
+def import_products():
+    file = request.files.get('file')
+    if not file:
+        return jsonify({'message': 'File is required.'}), 400
+    file_format = request.form.get('format') or file.filename.rsplit('.', 1)[-1].lower()
+    if file_format not in ['csv', 'jsonl']:
+        return jsonify({'message': 'File must be CSV or JSONL.'}), 400
+    try:
+        report = catalog_service.import_products(file.stream, file_format)
+        return jsonify({
+            'message': 'Products were imported.' if not report['errors'] else 'Products were imported with errors.',
+            'report': report
+        }), 200
+    except Exception as e:
+        return jsonify({'message': f'Product Import Failed: {str(e)}'}), 500
+
+@product_blueprint.route('/export', methods=['GET'])
+@admin_required
+def export_products():
+    file_format = request.args.get('format', 'csv', type=str)
+    if file_format not in ['csv', 'jsonl']:
+        return jsonify({'message': 'Format must be CSV or JSONL.'}), 400
+    return Response(
+        stream_with_context(catalog_service.export_products(file_format)),
+        mimetype='text/csv' if file_format == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=products.{file_format}'}
+    )
+
 @product_blueprint.route('/', methods=['POST'])
 @admin_required
 def create_product():
-    data = request.get_json()
+    if request.files:
+        data = json.loads(request.form.get('data', '{}'))
+        data['images'] = [{'file': file} for file in request.files.getlist('images')] + data.get('images', [])
+    else:
+        data = request.get_json()
     try:
         product = product_service.create_product(data)
         return jsonify({
             'message': 'Product was created successfully.',
-            'product': product_service.serialize_product(product)
+            'product': product
         }), 201
     except Exception as e:
         return jsonify({'message': f'Product Creation Failed: {str(e)}'}), 500
@@ -96,6 +164,68 @@ def manage_product(product_id):
             return jsonify({'message': f'Product Deletion Failed: {str(e)}'}), 500
     return jsonify({'message': 'Invalid Request Method'}), 405
 
+@product_blueprint.route('/variants/bulk', methods=['PATCH'])
+@admin_required
+def bulk_update_product_variants():
+    data = request.get_json() or {}
+    updates = data.get('updates')
+    rule = data.get('rule')
+    if rule is not None:
+        if not isinstance(rule, dict):
+            return jsonify({'message': 'Rule must be an object.'}), 400
+        discount_percent = rule.get('discount_percent')
+        if discount_percent is not None and (not isinstance(discount_percent, (int, float)) or isinstance(discount_percent, bool)):
+            return jsonify({'message': 'Discount must be a number.'}), 400
+        for key in ('variant_ids', 'product_ids', 'category_ids'):
+            ids = rule.get(key)
+            if ids is not None and (not isinstance(ids, list) or any(not isinstance(value, int) or isinstance(value, bool) for value in ids)):
+                return jsonify({'message': f'{key} must be a list of integers.'}), 400
+    try:
+        if rule is not None:
+            updated = product_service.apply_variant_discount(
+                discount_percent,
+                variant_ids=rule.get('variant_ids'),
+                product_ids=rule.get('product_ids'),
+                category_ids=rule.get('category_ids')
+            )
+        elif isinstance(updates, list) and updates:
+            if len(updates) > VARIANT_BULK_LIMIT:
+                return jsonify({'message': f'At most {VARIANT_BULK_LIMIT} variants can be updated at once.'}), 400
+            updated, errors = product_service.bulk_update_product_variants(updates)
+            if errors:
+                return jsonify({
+                    'message': 'Product variants could not be updated.',
+                    'errors': errors
+                }), 400
+        else:
+            return jsonify({'message': 'Updates or a rule is required.'}), 400
+        return jsonify({
+            'message': 'Product variants were updated successfully.',
+            'updated': updated
+        }), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Product Variant Update Failed: {str(e)}'}), 500
+
+@product_blueprint.route('/<int:product_id>/variants/resolve', methods=['GET'])
+def resolve_product_variant(product_id):
+    try:
+        option_index, variant = product_service.resolve_product_variant(product_id, request.args.to_dict())
+        if option_index is None:
+            return jsonify({'message': 'Product could not be found.'}), 404
+        if not variant:
+            return jsonify({
+                'message': 'Variant could not be found.',
+                'options': option_index['options']
+            }), 404
+        return jsonify({
+            'variant': variant,
+            'options': option_index['options']
+        }), 200
+    except Exception as e:
+        return jsonify({'message': f'Variant Resolution Failed: {str(e)}'}), 500
+
 @product_blueprint.route('/<int:product_id>/variants', methods=['POST'])
 @admin_required
 def create_product_variant(product_id):
@@ -146,6 +276,7 @@ def manage_product_variant(product_id, variant_id):
     return jsonify({'message': 'Invalid Request Method'}), 405
 
 @product_blueprint.route('/<int:product_id>/recommended', methods=['GET'])
+@conditional_get(lambda product_id: product_service.get_catalog_version())
 def get_recommended_products(product_id):
     limit = request.args.get('limit', 4, type=int)
     try:
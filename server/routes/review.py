@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import get_jwt_identity
 
+from utils import parse_fields, InvalidCursorError
 from services.user import UserService
 from services.review import ReviewService
+from middlewares.cache import conditional_get
 from middlewares.user import auth_required, admin_required
 
 review_blueprint = Blueprint('review', __name__, url_prefix='/reviews')
@@ -10,6 +12,7 @@ review_service = ReviewService()
 user_service = UserService()
 
 @review_blueprint.route('/', methods=['GET'])
+@conditional_get(lambda: review_service.get_review_version())
 def get_reviews():
     product_id = request.args.get('product_id', type=int)
     user_id = request.args.get('user_id', type=int)
@@ -17,26 +20,36 @@ def get_reviews():
     per_page = request.args.get('per_page', 10, type=int)  
     approved = request.args.get('approved', type=lambda v: v.lower() == 'true' if v else None)
     verified = request.args.get('verified', type=lambda v: v.lower() == 'true' if v else None)  
+    cursor = request.args.get('cursor', type=str)
+    include_count = request.args.get('include_count', 'true' if cursor is None else 'false').lower() == 'true'
+    fields = parse_fields(request.args.get('fields', type=str))
     try:
-        reviews, count, total_pages, rating_counts = review_service.get_reviews(
+        reviews, count, total_pages, rating_counts, next_cursor = review_service.get_reviews(
             product_id=product_id, 
             user_id=user_id,
             page=page, 
             per_page=per_page,
             approved=approved,
-            verified=verified)
+            verified=verified,
+            cursor=cursor,
+            include_count=include_count,
+            fields=fields)
         return jsonify({
-            'reviews': [review_service.serialize_review(review) for review in reviews],
+            'reviews': [review_service.serialize_review(review, fields) for review in reviews],
             'count': count,
             'total_pages': total_pages,
             'page': page,
             'per_page': per_page,
             'rating_counts': rating_counts,
+            'next_cursor': next_cursor,
         }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor.'}), 400
     except Exception as e:
         return jsonify({'message': f'Reviews Fetch Failed: {str(e)}'}), 500
     
 @review_blueprint.route('/<int:review_id>', methods=['GET'])
+@conditional_get(lambda review_id: review_service.get_review_version())
 def get_review(review_id):
     try:
         review = review_service.get_review_by_id(review_id)
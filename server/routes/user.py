@@ -1,12 +1,21 @@
 from sqlalchemy.exc import IntegrityError
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, set_access_cookies, set_refresh_cookies, unset_jwt_cookies, jwt_required
 
+from utils import InvalidCursorError
 from services.user import UserService
+from services.cart import CartService
 from middlewares.user import auth_required, admin_required
 
 user_blueprint = Blueprint('user', __name__, url_prefix='/users')
 user_service = UserService()
+cart_service = CartService()
+
+def merge_session_cart(user_id: int) -> None:
+    try:
+        cart_service.merge_anonymous_cart(user_id, request.cookies.get('cart_session'))
+    except Exception:
+        current_app.logger.exception('Anonymous cart merge failed for user %s.', user_id)
 
 @user_blueprint.route('/register', methods=['POST'])
 def register():
@@ -28,6 +37,7 @@ def register():
         })
         set_access_cookies(response, access_token)
         set_refresh_cookies(response, refresh_token)
+        merge_session_cart(user.id)
         return response, 201
     except IntegrityError:
         return jsonify({'message': 'Email is already registered to an existing user.'}), 409
@@ -51,6 +61,7 @@ def login():
     })
     set_access_cookies(response, access_token)
     set_refresh_cookies(response, refresh_token)
+    merge_session_cart(user.id)
     return response, 200
 
 @user_blueprint.route('/refresh', methods=['POST'])
@@ -124,20 +135,25 @@ def logout():
 def get_users():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor', type=str)
+    include_count = request.args.get('include_count', 'true' if cursor is None else 'false').lower() == 'true'
     search = request.args.get('search', type=str)
     is_admin = request.args.get('is_admin', type=bool)
     filters = {}
     if is_admin is not None:
         filters['is_admin'] = is_admin
     try:
-        users, count, total_pages = user_service.get_all_users(page, per_page, filters, search)
+        users, count, total_pages, next_cursor = user_service.get_all_users(page, per_page, filters, search, cursor, include_count)
         return jsonify({
             'users': [user_service.serialize_user(user) for user in users],
             'count': count,
             'total_pages': total_pages,
             'page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'next_cursor': next_cursor
         }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor.'}), 400
     except Exception as e:
         return jsonify({'message': f'Users Fetch Failed: {str(e)}'}), 500
 
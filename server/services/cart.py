@@ -1,69 +1,94 @@
 import uuid
-from typing import Dict, Optional, Any
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Tuple
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import SQLAlchemyError
 
 
 from app import db
 from models.cart import Cart, CartItem
-from models.product import ProductVariant
+from models.product import Product, ProductVariant, ProductImage
+
+CART_BATCH_LIMIT = 100
+
+class CartConflictError(Exception):
+    pass
 
 class CartService:
     def create_cart(self, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Cart:
-        cart = Cart(user_id=user_id, session_id=session_id)
-        db.session.add(cart)
-        db.session.commit()
+        session_id = None if user_id else session_id or str(uuid.uuid4())
+        db.session.execute(insert(Cart).values(user_id=user_id, session_id=session_id).on_conflict_do_nothing())
+        cart = self.find_cart(user_id, session_id, for_update=True)
+        if not cart:
+            db.session.rollback()
+            raise CartConflictError("Cart session is no longer valid.")
         return cart
     
+    def find_cart(self, user_id: Optional[int] = None, session_id: Optional[str] = None, for_update: bool = False) -> Optional[Cart]:
+        cart_query = db.session.query(Cart)
+        if user_id:
+            cart_query = cart_query.filter(Cart.user_id == user_id)
+        elif session_id:
+            cart_query = cart_query.filter(Cart.session_id == session_id, Cart.user_id.is_(None))
+        else:
+            return None
+        if for_update:
+            cart_query = cart_query.options(
+                selectinload(Cart.items).selectinload(CartItem.variant),
+                selectinload(Cart.items).selectinload(CartItem.product)
+            ).with_for_update()
+        return cart_query.first()
+
+    def get_empty_cart(self, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Cart:
+        return Cart(user_id=user_id, session_id=None if user_id else session_id)
+
     def get_cart(self, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Cart:
+        return self.find_cart(user_id, session_id) or self.get_empty_cart(user_id, session_id)
+
+    def get_cart_for_update(self, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Optional[Cart]:
         try:
-            if user_id:
-                cart = (
-                    db.session.query(Cart)
-                    .options(
-                        selectinload(Cart.items).selectinload(CartItem.variant),
-                        selectinload(Cart.items).selectinload(CartItem.product)
-                    )
-                    .filter_by(user_id=user_id)
-                    .with_for_update()
-                    .first()
-                )
-                if not cart:
-                    cart = self.create_cart(user_id=user_id, session_id=session_id)
-                if session_id:
-                    anonymous_cart = db.session.query(Cart).filter(
-                        Cart.session_id == session_id,
-                        Cart.user_id == None
-                    ).with_for_update().first()
-                    if anonymous_cart:
-                        self.merge_carts(anonymous_cart, cart)
-                        db.session.delete(anonymous_cart)
-            elif session_id:
-                cart = db.session.query(Cart).filter_by(session_id=session_id).first()
-                if not cart:
-                    cart = self.create_cart(session_id=session_id)
+            return self.find_cart(user_id, session_id, for_update=True)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
+
+    def merge_anonymous_cart(self, user_id: int, session_id: Optional[str]) -> None:
+        if not session_id:
+            return
+        try:
+            anonymous_cart = self.find_cart(session_id=session_id, for_update=True)
+            if not anonymous_cart:
+                return
+            cart = self.get_cart_for_update(user_id=user_id)
+            if cart:
+                self.merge_carts(anonymous_cart, cart)
+                db.session.delete(anonymous_cart)
             else:
-                cart = self.create_cart(session_id=str(uuid.uuid4()))
-            return cart
+                anonymous_cart.user_id = user_id
+                anonymous_cart.session_id = None
+            db.session.commit()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
     
+    def on_cart_item_conflict(self, statement):
+        return statement.on_conflict_do_update(
+            constraint='uq_cart_item_product_variant',
+            set_={
+                'quantity': CartItem.quantity + statement.excluded.quantity,
+                'updated_at': func.now()
+            }
+        )
+
     def merge_carts(self, source_cart: Cart, target_cart: Cart) -> None:
-        for source_item in source_cart.items:
-            target_item = next(
-                (item for item in target_cart.items if item.product_id == source_item.product_id), 
-                None
+        db.session.execute(self.on_cart_item_conflict(insert(CartItem).from_select(
+            ['cart_id', 'product_id', 'variant_id', 'quantity'],
+            select(literal(target_cart.id), CartItem.product_id, CartItem.variant_id, CartItem.quantity).where(
+                CartItem.cart_id == source_cart.id
             )
-            if target_item:
-                target_item.quantity += source_item.quantity
-            else:
-                new_item = CartItem(
-                    cart_id=target_cart.id,
-                    product_id=source_item.product_id,
-                    quantity=source_item.quantity
-                )
-                db.session.add(new_item)
+        )))
     
     def add_to_cart(self, product_id: int, variant_id: int, quantity: int = 1, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Optional[CartItem]:
         if variant_id:
@@ -71,30 +96,23 @@ class CartService:
             if not variant:
                 return None
             product_id = variant.product_id
-        else:
-            product_id = product_id
-            variant = None
-        cart = self.get_cart(user_id=user_id, session_id=session_id)
-        cart_item = db.session.query(CartItem).filter(
-            CartItem.cart_id == cart.id,
-            CartItem.product_id == product_id,
-            CartItem.variant_id == variant_id
-        ).first()
-        if cart_item:
-            cart_item.quantity += quantity
-        else:
-            cart_item = CartItem(
+        cart = self.get_cart_for_update(user_id=user_id, session_id=session_id) or self.create_cart(user_id=user_id, session_id=session_id)
+        cart_item = db.session.execute(
+            self.on_cart_item_conflict(insert(CartItem).values(
                 cart_id=cart.id,
                 product_id=product_id,
-                variant_id=variant.id if variant else None,
+                variant_id=variant_id or None,
                 quantity=quantity
-            )
-            db.session.add(cart_item)
+            )).returning(CartItem),
+            execution_options={'populate_existing': True}
+        ).scalar_one()
         db.session.commit()
         return cart_item
     
     def update_cart_item(self, cart_item_id: int, quantity: int, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Optional[CartItem]:
-        cart = self.get_cart(user_id=user_id, session_id=session_id)
+        cart = self.get_cart_for_update(user_id=user_id, session_id=session_id)
+        if not cart:
+            return None
         cart_item = db.session.query(CartItem).filter(
             CartItem.id == cart_item_id,
             CartItem.cart_id == cart.id
@@ -109,7 +127,9 @@ class CartService:
         return cart_item if quantity > 0 else None
     
     def remove_from_cart(self, cart_item_id: int, user_id: Optional[int] = None, session_id: Optional[str] = None) -> bool:
-        cart = self.get_cart(user_id=user_id, session_id=session_id)
+        cart = self.get_cart_for_update(user_id=user_id, session_id=session_id)
+        if not cart:
+            return False
         cart_item = db.session.query(CartItem).filter(
             CartItem.id == cart_item_id,
             CartItem.cart_id == cart.id
@@ -121,18 +141,175 @@ class CartService:
         return True
     
     def clear_cart(self, user_id: Optional[int] = None, session_id: Optional[str] = None) -> bool:
-        cart = self.get_cart(user_id=user_id, session_id=session_id)
+        cart = self.get_cart_for_update(user_id=user_id, session_id=session_id)
+        if not cart:
+            return True
         db.session.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
         db.session.commit()
         return True
     
-    def serialize_cart_item(self, cart_item: CartItem) -> Dict[str, Any]:
-        cart_item_data = cart_item.to_dict()
-        cart_item_data.update({
-            "product_name": cart_item.product.name,
-            "variant_name": cart_item.variant.name,
-        })
-        return cart_item_data
-    
+    def validate_cart_operations(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        errors = []
+        for index, operation in enumerate(operations):
+            op = operation.get('op')
+            if op == 'add':
+                keys = ('variant_id',) if operation.get('variant_id') is not None else ('product_id',)
+            elif op in ('update', 'remove'):
+                keys = ('cart_item_id',)
+            else:
+                errors.append({'index': index, 'message': f"Unknown operation '{op}'."})
+                continue
+            for key in keys:
+                value = operation.get(key)
+                if not isinstance(value, int) or isinstance(value, bool):
+                    errors.append({'index': index, 'message': f"{key} must be an integer."})
+        return errors
+
+    def upsert_cart_items(self, cart: Cart, quantities: Dict[Tuple[int, Optional[int]], int]) -> None:
+        if not quantities:
+            return
+        db.session.execute(
+            self.on_cart_item_conflict(insert(CartItem).values([
+                {'cart_id': cart.id, 'product_id': product_id, 'variant_id': variant_id, 'quantity': quantity}
+                for (product_id, variant_id), quantity in quantities.items()
+            ])).returning(CartItem),
+            execution_options={'populate_existing': True}
+        ).scalars().all()
+        quantities.clear()
+
+    def apply_cart_operations(self, operations: List[Dict[str, Any]], user_id: Optional[int] = None, session_id: Optional[str] = None) -> Tuple[Optional[Cart], List[Dict[str, Any]]]:
+        errors = self.validate_cart_operations(operations)
+        if errors:
+            return None, errors
+        variant_ids = {operation['variant_id'] for operation in operations if operation['op'] == 'add' and operation.get('variant_id') is not None}
+        product_ids = {operation['product_id'] for operation in operations if operation['op'] == 'add' and operation.get('variant_id') is None}
+        variants = {
+            variant.id: variant for variant in db.session.query(ProductVariant).filter(ProductVariant.id.in_(variant_ids))
+        } if variant_ids else {}
+        existing_product_ids = set(db.session.execute(
+            select(Product.id).where(Product.id.in_(product_ids))
+        ).scalars()) if product_ids else set()
+        try:
+            cart = self.get_cart_for_update(user_id=user_id, session_id=session_id)
+            if not cart and any(operation['op'] == 'add' for operation in operations):
+                cart = self.create_cart(user_id=user_id, session_id=session_id)
+            items = {item.id: item for item in cart.items} if cart else {}
+            additions = {}
+            for index, operation in enumerate(operations):
+                op = operation['op']
+                quantity = operation.get('quantity', 1 if op == 'add' else None)
+                if op == 'add':
+                    if not isinstance(quantity, int) or quantity <= 0:
+                        errors.append({'index': index, 'message': "Quantity must be a positive integer."})
+                        continue
+                    variant_id = operation.get('variant_id')
+                    if variant_id is not None:
+                        if variant_id not in variants:
+                            errors.append({'index': index, 'message': f"Variant {variant_id} could not be found."})
+                            continue
+                        product_id = variants[variant_id].product_id
+                    else:
+                        product_id = operation['product_id']
+                        if product_id not in existing_product_ids:
+                            errors.append({'index': index, 'message': f"Product {product_id} could not be found."})
+                            continue
+                    additions[(product_id, variant_id)] = additions.get((product_id, variant_id), 0) + quantity
+                else:
+                    self.upsert_cart_items(cart, additions)
+                    cart_item = items.get(operation['cart_item_id'])
+                    if not cart_item:
+                        errors.append({'index': index, 'message': f"Cart item {operation['cart_item_id']} could not be found."})
+                        continue
+                    if op == 'update' and (not isinstance(quantity, int) or quantity < 0):
+                        errors.append({'index': index, 'message': "Quantity must be a non-negative integer."})
+                        continue
+                    if op == 'remove' or quantity == 0:
+                        db.session.delete(cart_item)
+                        del items[cart_item.id]
+                    else:
+                        cart_item.quantity = quantity
+            if errors:
+                db.session.rollback()
+                return None, errors
+            self.upsert_cart_items(cart, additions)
+            db.session.commit()
+            return cart, errors
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
+
+    def delete_abandoned_carts(self, ttl_days: int, batch_size: int) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+        abandoned_cart_ids = select(Cart.id).where(
+            Cart.user_id.is_(None),
+            Cart.updated_at < cutoff,
+            ~select(CartItem.id).where(CartItem.cart_id == Cart.id, CartItem.updated_at >= cutoff).exists()
+        ).order_by(Cart.id).limit(batch_size).with_for_update(skip_locked=True)
+        deleted = 0
+        while True:
+            result = db.session.execute(
+                delete(Cart).where(Cart.id.in_(abandoned_cart_ids)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+
+    def get_cart_item_rows(self, cart_id: int) -> List[Any]:
+        variant_image = select(ProductImage.url).where(ProductImage.variant_id == CartItem.variant_id).order_by(ProductImage.id).limit(1).scalar_subquery()
+        product_image = select(ProductImage.url).where(ProductImage.product_id == CartItem.product_id).order_by(ProductImage.id).limit(1).scalar_subquery()
+        return db.session.execute(
+            select(
+                CartItem.id, CartItem.cart_id, CartItem.product_id, CartItem.variant_id, CartItem.quantity,
+                CartItem.created_at, CartItem.updated_at,
+                Product.name.label('product_name'), Product.slug.label('product_slug'),
+                Product.display_price, Product.total_stock,
+                ProductVariant.name.label('variant_name'), ProductVariant.price.label('variant_price'), ProductVariant.stock.label('variant_stock'),
+                ProductVariant.option1_value, ProductVariant.option2_value, ProductVariant.option3_value,
+                func.coalesce(variant_image, product_image).label('thumbnail'),
+            ).join(Product, Product.id == CartItem.product_id).outerjoin(
+                ProductVariant, ProductVariant.id == CartItem.variant_id
+            ).where(CartItem.cart_id == cart_id).order_by(CartItem.id)
+        ).all()
+
+    def serialize_cart_item_row(self, row: Any) -> Dict[str, Any]:
+        price = float(row.variant_price if row.variant_id else row.display_price)
+        stock = row.variant_stock if row.variant_id else row.total_stock
+        return {
+            "id": row.id,
+            "cart_id": row.cart_id,
+            "product_id": row.product_id,
+            "variant_id": row.variant_id,
+            "quantity": row.quantity,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+            "price": price,
+            "subtotal": price * row.quantity,
+            "in_stock": stock >= row.quantity,
+            "thumbnail": row.thumbnail,
+            "product": {
+                "id": row.product_id,
+                "name": row.product_name,
+                "slug": row.product_slug,
+            },
+            "variant": {
+                "id": row.variant_id,
+                "name": row.variant_name,
+                "option1_value": row.option1_value,
+                "option2_value": row.option2_value,
+                "option3_value": row.option3_value,
+            } if row.variant_id else None,
+        }
+
     def serialize_cart(self, cart: Cart) -> Dict[str, Any]:
-        return cart.to_dict()
\ No newline at end of file
+        items = [self.serialize_cart_item_row(row) for row in self.get_cart_item_rows(cart.id)] if cart.id else []
+        return {
+            "id": cart.id,
+            "user_id": cart.user_id,
+            "session_id": cart.session_id,
+            "created_at": cart.created_at,
+            "updated_at": cart.updated_at,
+            "subtotal": sum(item["subtotal"] for item in items),
+            "items": items,
+        }
\ No newline at end of file
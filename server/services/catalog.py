@@ -0,0 +1,235 @@
+import io
+import csv
+import json
+import itertools
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, List, Optional, Any, Iterator, Iterable, Tuple
+
+from app import db
+from utils import generate_slug, generate_variant_name
+from services.product import ProductService
+from models.category import Category
+from models.product import Product, ProductVariant
+
+IMPORT_CHUNK_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+def parse_text(value: Any) -> Optional[str]:
+    return str(value).strip() or None
+
+def parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if str(value).strip().lower() in ('true', '1', 'yes'):
+        return True
+    if str(value).strip().lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean '{value}'")
+
+def parse_int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid integer '{value}'")
+
+def parse_decimal(value: Any) -> Decimal:
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"Invalid number '{value}'")
+
+PRODUCT_FIELDS = {
+    'name': parse_text,
+    'category_id': parse_int,
+    'description': parse_text,
+    'benefits': parse_text,
+    'ingredients': parse_text,
+    'instructions': parse_text,
+    'is_active': parse_bool,
+    'is_featured': parse_bool,
+    'meta_title': parse_text,
+    'meta_description': parse_text,
+    'weight': parse_decimal,
+    'width': parse_decimal,
+    'height': parse_decimal,
+    'length': parse_decimal,
+    'option1_name': parse_text,
+    'option2_name': parse_text,
+    'option3_name': parse_text,
+    'base_price': parse_decimal,
+    'sale_price': parse_decimal,
+    'stock': parse_int,
+}
+
+VARIANT_FIELDS = {
+    'variant_name': ('name', parse_text),
+    'variant_base_price': ('base_price', parse_decimal),
+    'variant_sale_price': ('sale_price', parse_decimal),
+    'variant_stock': ('stock', parse_int),
+    'option1_value': ('option1_value', parse_text),
+    'option2_value': ('option2_value', parse_text),
+    'option3_value': ('option3_value', parse_text),
+}
+
+EXPORT_COLUMNS = ['slug', *PRODUCT_FIELDS, *VARIANT_FIELDS]
+
+class CatalogService:
+    def __init__(self):
+        self.product_service = ProductService()
+
+    def read_rows(self, stream: io.IOBase, file_format: str) -> Iterator[Any]:
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        rows = csv.DictReader(text_stream) if file_format == 'csv' else (line for line in text_stream if line.strip())
+        while True:
+            try:
+                yield next(rows)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield ValueError(f'Unreadable Row: {str(e)}')
+            except UnicodeDecodeError as e:
+                yield ValueError(f'Unreadable Row: {str(e)}')
+                return
+
+    def parse_row(self, row: Any) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        if isinstance(row, Exception):
+            raise row
+        if isinstance(row, str):
+            row = json.loads(row)
+        if not isinstance(row, dict):
+            raise ValueError("Row must be an object.")
+        product_values, variant_values = {}, {}
+        for field, parse in PRODUCT_FIELDS.items():
+            if field in row:
+                product_values[field] = parse(row[field]) if row[field] not in (None, '') else None
+        for field, (column, parse) in VARIANT_FIELDS.items():
+            if row.get(field) not in (None, ''):
+                variant_values[column] = parse(row[field])
+        if not product_values.get('name'):
+            raise ValueError("Name is required.")
+        product_values['slug'] = generate_slug(product_values['name'])
+        if 'category_id' in product_values and product_values['category_id'] is None:
+            raise ValueError("Category is required.")
+        if not variant_values:
+            return product_values, None
+        if variant_values.get('base_price') is None:
+            raise ValueError("Variant base price is required.")
+        if variant_values.get('sale_price') is not None and variant_values['sale_price'] >= variant_values['base_price']:
+            raise ValueError("Sale price must be less than the base price.")
+        if variant_values.get('stock', 0) < 0:
+            raise ValueError("Stock cannot be negative.")
+        return product_values, variant_values
+
+    def import_products(self, stream: io.IOBase, file_format: str) -> Dict[str, Any]:
+        report = {'rows': 0, 'products': 0, 'variants': 0, 'errors': []}
+        rows = enumerate(self.read_rows(stream, file_format), start=1)
+        while True:
+            chunk = list(itertools.islice(rows, IMPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            report['rows'] += len(chunk)
+            self.import_chunk(chunk, report)
+        return report
+
+    def import_chunk(self, chunk: List[Tuple[int, Any]], report: Dict[str, Any]) -> None:
+        products, variants, product_rows = {}, {}, {}
+        for row_number, row in chunk:
+            try:
+                product_values, variant_values = self.parse_row(row)
+            except (ValueError, TypeError) as e:
+                report['errors'].append({'row': row_number, 'message': str(e)})
+                continue
+            products.setdefault(product_values['slug'], {}).update(product_values)
+            product_rows.setdefault(product_values['slug'], []).append(row_number)
+            if variant_values:
+                key = (product_values['slug'], variant_values.get('option1_value'), variant_values.get('option2_value'), variant_values.get('option3_value'))
+                variants[key] = dict(variant_values, product_name=product_values['name'])
+        existing_categories = dict(db.session.execute(
+            select(Product.slug, Product.category_id).where(Product.slug.in_(list(products)))
+        ).all())
+        for slug, product_values in list(products.items()):
+            if 'category_id' in product_values:
+                continue
+            if slug in existing_categories:
+                product_values['category_id'] = existing_categories[slug]
+            else:
+                report['errors'].extend({'row': row_number, 'message': "Category is required."} for row_number in product_rows[slug])
+                del products[slug]
+        category_ids = {product_values['category_id'] for product_values in products.values()}
+        existing_category_ids = set(db.session.execute(
+            select(Category.id).where(Category.id.in_(category_ids))
+        ).scalars()) if category_ids else set()
+        for slug, product_values in list(products.items()):
+            if product_values['category_id'] not in existing_category_ids:
+                report['errors'].extend({'row': row_number, 'message': f"Category {product_values['category_id']} could not be found."} for row_number in product_rows[slug])
+                del products[slug]
+        variants = {key: variant_values for key, variant_values in variants.items() if key[0] in products}
+        if not products:
+            return
+        try:
+            product_ids = self.upsert_products(list(products.values()))
+            variant_count = self.upsert_variants(variants, product_ids)
+            self.product_service.refresh_product_aggregates(list(product_ids.values()))
+            db.session.commit()
+            self.product_service.invalidate_product_caches(list(product_ids.values()))
+            report['products'] += len(product_ids)
+            report['variants'] += variant_count
+        except Exception as e:
+            db.session.rollback()
+            report['errors'].extend({'row': row_number, 'message': f'Import Failed: {str(getattr(e, "orig", e))}'} for row_numbers in product_rows.values() for row_number in row_numbers)
+
+    def upsert_products(self, products: List[Dict[str, Any]]) -> Dict[str, int]:
+        product_ids = {}
+        for columns, group in itertools.groupby(sorted(products, key=lambda values: sorted(values)), key=lambda values: tuple(sorted(values))):
+            statement = insert(Product).values(list(group))
+            statement = statement.on_conflict_do_update(
+                index_elements=[Product.slug],
+                set_={column: statement.excluded[column] for column in columns if column != 'slug'}
+            ).returning(Product.id, Product.slug)
+            product_ids.update({slug: product_id for product_id, slug in db.session.execute(statement)})
+        return product_ids
+
+    def upsert_variants(self, variants: Dict[Tuple, Dict[str, Any]], product_ids: Dict[str, int]) -> int:
+        groups = {}
+        for (slug, option1_value, option2_value, option3_value), variant_values in variants.items():
+            product_name = variant_values.pop('product_name')
+            columns = tuple(sorted(column for column in variant_values if column not in ('option1_value', 'option2_value', 'option3_value')))
+            row = dict(variant_values, product_id=product_ids[slug], option1_value=option1_value, option2_value=option2_value, option3_value=option3_value)
+            if not row.get('name'):
+                row['name'] = generate_variant_name(product_name, option1_value, option2_value, option3_value)
+            groups.setdefault(columns, []).append(row)
+        for columns, rows in groups.items():
+            statement = insert(ProductVariant).values(rows)
+            statement = statement.on_conflict_do_update(
+                constraint='uq_product_variant_options',
+                set_={column: statement.excluded[column] for column in columns}
+            )
+            db.session.execute(statement)
+        return sum(len(rows) for rows in groups.values())
+
+    def export_rows(self) -> Iterator[Dict[str, Any]]:
+        query = db.session.query(Product, ProductVariant).outerjoin(
+            ProductVariant, ProductVariant.product_id == Product.id
+        ).order_by(Product.id, ProductVariant.id).yield_per(EXPORT_BATCH_SIZE)
+        for product, variant in query:
+            row = {'slug': product.slug}
+            row.update({field: getattr(product, field) for field in PRODUCT_FIELDS})
+            row.update({field: getattr(variant, column) if variant else None for field, (column, _) in VARIANT_FIELDS.items()})
+            yield row
+
+    def export_products(self, file_format: str) -> Iterable[str]:
+        if file_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+            for row in self.export_rows():
+                writer.writerow(row)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for row in self.export_rows():
+                yield json.dumps(row, default=str) + '\n'
@@ -1,11 +1,21 @@
-from sqlalchemy.orm import joinedload
-from typing import Dict, List, Optional, Any
+from threading import Lock
+from cachetools import TTLCache
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 from app import db
-from models.category import Category, CategoryImage
-from utils import generate_slug, upload_image_to_gcs, delete_image_from_gcs
+from models.product import Product
+from models.category import Category, CategoryImage, CategoryClosure
+from utils import generate_slug, upload_image_to_gcs, delete_image_from_gcs, get_cache_version, load_only_fields
+
+category_tree_cache = TTLCache(maxsize=8, ttl=600)
+category_tree_cache_lock = Lock()
 
 class CategoryService:
+    def get_category_version(self) -> Tuple:
+        return get_cache_version()
+
     def get_category_by_id(self, category_id: int) -> Optional[Category]:
         return db.session.get(Category, category_id)
     
@@ -13,15 +23,24 @@ class CategoryService:
         return db.session.query(Category).filter(Category.slug == slug).first()
     
     def get_category_with_subcategories(self, category_id: int) -> Optional[Dict[str, Any]]:
-        category = self.get_category_by_id(category_id)
-        if not category:
-            return None
-        return self.serialize_category_tree(category)
+        return self.get_cached_category_tree()['nodes'].get(category_id)
 
-    def get_all_categories(self, filters: Optional[Dict[str, Any]] = None) -> List[Category]:
-        category_query = db.session.query(Category).options(
-            joinedload(Category.subcategories)
-        )
+    def get_category_with_subcategories_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
+        return self.get_cached_category_tree()['slugs'].get(slug)
+
+    def get_category_loader_options(self, fields: Set[str]) -> List[Any]:
+        options = [load_only_fields(Category, fields, Category.parent_category_id)]
+        if 'image' in fields:
+            options.append(selectinload(Category.image))
+        return options
+
+    def get_all_categories(self, filters: Optional[Dict[str, Any]] = None, fields: Optional[Set[str]] = None) -> List[Category]:
+        if fields is not None:
+            category_query = db.session.query(Category).options(*self.get_category_loader_options(fields))
+        else:
+            category_query = db.session.query(Category).options(
+                joinedload(Category.subcategories)
+            )
         if filters:
             for key, value in filters.items():
                 if hasattr(Category, key):
@@ -33,8 +52,73 @@ class CategoryService:
         return category_query.all()
     
     def get_category_tree(self) -> List[Dict[str, Any]]:
-        parent_categories = self.get_all_categories(filters={"parent_category_id": None})
-        return [self.serialize_category_tree(category) for category in parent_categories]
+        return self.get_cached_category_tree()['roots']
+
+    def get_cached_category_tree(self) -> Dict[str, Any]:
+        version = self.get_category_version()
+        with category_tree_cache_lock:
+            category_tree = category_tree_cache.get(version)
+        if category_tree is not None:
+            return category_tree
+        category_tree = self.build_category_tree()
+        with category_tree_cache_lock:
+            category_tree_cache[version] = category_tree
+        return category_tree
+
+    def build_category_tree(self) -> Dict[str, Any]:
+        tree = select(Category.id, Category.parent_category_id).where(
+            Category.parent_category_id.is_(None)
+        ).cte('category_tree', recursive=True)
+        tree = tree.union_all(
+            select(Category.id, Category.parent_category_id).join(tree, Category.parent_category_id == tree.c.id)
+        )
+        rows = db.session.execute(
+            select(
+                Category.id, Category.parent_category_id, Category.name, Category.description, Category.slug,
+                CategoryImage.id.label('image_id'), CategoryImage.url.label('image_url'),
+                CategoryImage.created_at.label('image_created_at'), CategoryImage.updated_at.label('image_updated_at'),
+            ).join(tree, tree.c.id == Category.id).outerjoin(
+                CategoryImage, CategoryImage.category_id == Category.id
+            ).order_by(Category.id, CategoryImage.id)
+        ).all()
+        product_counts = dict(db.session.execute(
+            select(CategoryClosure.ancestor_id, func.count(Product.id)).join(
+                Product, Product.category_id == CategoryClosure.descendant_id
+            ).group_by(CategoryClosure.ancestor_id)
+        ).all())
+        nodes = {}
+        for row in rows:
+            if row.id in nodes:
+                continue
+            nodes[row.id] = {
+                'id': row.id,
+                'parent_category_id': row.parent_category_id,
+                'name': row.name,
+                'description': row.description,
+                'slug': row.slug,
+                'image': {
+                    'id': row.image_id,
+                    'category_id': row.id,
+                    'url': row.image_url,
+                    'created_at': row.image_created_at,
+                    'updated_at': row.image_updated_at,
+                } if row.image_id is not None else None,
+                'product_count': product_counts.get(row.id, 0),
+                'subcategories': [],
+            }
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node['parent_category_id'])
+            if parent is None:
+                roots.append(node)
+            else:
+                parent['subcategories'].append(node)
+        return {
+            'roots': roots,
+            'nodes': nodes,
+            'slugs': {node['slug']: node for node in nodes.values()},
+            'product_counts': product_counts,
+        }
     
     def create_category(self, data: Dict[str, Any]) -> Category:
         category = Category(
@@ -44,6 +128,8 @@ class CategoryService:
             parent_category_id=data.get('parent_category_id')
         )
         db.session.add(category)
+        db.session.flush()
+        self.insert_category_paths(category.id, category.parent_category_id)
         db.session.commit()
         return category
     
@@ -51,13 +137,17 @@ class CategoryService:
         category = self.get_category_by_id(category_id)
         if not category:
             return None
+        parent_category_id = category.parent_category_id
         for field in ['name', 'description', 'parent_category_id']:
             if field in data:
-                if field == 'parent_category_id' and data[field] == category_id:
+                if field == 'parent_category_id' and self.is_descendant(data[field], category_id):
                     continue
                 setattr(category, field, data[field])
         if 'name' in data:
             category.slug = generate_slug(data['name'])
+        if category.parent_category_id != parent_category_id:
+            db.session.flush()
+            self.move_category_paths(category_id, category.parent_category_id)
         db.session.commit()
         return category
     
@@ -69,33 +159,68 @@ class CategoryService:
             for subcategory in category.subcategories:
                 subcategory.parent_category_id = category.parent_category_id
         db.session.flush()
+        self.delete_category_paths(category_id)
         db.session.delete(category)
         db.session.commit()
         return True
+
+    def is_descendant(self, category_id: Optional[int], ancestor_id: int) -> bool:
+        if category_id is None:
+            return False
+        return db.session.get(CategoryClosure, (ancestor_id, category_id)) is not None
+
+    def insert_category_paths(self, category_id: int, parent_category_id: Optional[int]) -> None:
+        db.session.execute(insert(CategoryClosure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            select(CategoryClosure.ancestor_id, literal(category_id), CategoryClosure.depth + 1).where(
+                CategoryClosure.descendant_id == parent_category_id
+            ).union_all(select(literal(category_id), literal(category_id), literal(0)))
+        ))
+
+    def move_category_paths(self, category_id: int, parent_category_id: Optional[int]) -> None:
+        subtree_ids = select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+        db.session.execute(delete(CategoryClosure).where(
+            CategoryClosure.descendant_id.in_(subtree_ids),
+            CategoryClosure.ancestor_id.not_in(subtree_ids)
+        ), execution_options={'synchronize_session': False})
+        if parent_category_id is None:
+            return
+        ancestor, subtree = aliased(CategoryClosure), aliased(CategoryClosure)
+        db.session.execute(insert(CategoryClosure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            select(ancestor.ancestor_id, subtree.descendant_id, ancestor.depth + subtree.depth + 1).join(
+                subtree, subtree.ancestor_id == category_id
+            ).where(ancestor.descendant_id == parent_category_id)
+        ))
+
+    def delete_category_paths(self, category_id: int) -> None:
+        db.session.execute(update(CategoryClosure).where(
+            CategoryClosure.ancestor_id.in_(select(CategoryClosure.ancestor_id).where(CategoryClosure.descendant_id == category_id, CategoryClosure.depth > 0)),
+            CategoryClosure.descendant_id.in_(select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id, CategoryClosure.depth > 0))
+        ).values(depth=CategoryClosure.depth - 1), execution_options={'synchronize_session': False})
+        db.session.execute(delete(CategoryClosure).where(
+            (CategoryClosure.ancestor_id == category_id) | (CategoryClosure.descendant_id == category_id)
+        ), execution_options={'synchronize_session': False})
     
-    def serialize_category(self, category: Category) -> Dict[str, Any]:
-        return category.to_dict(include_subcategories=False)
-    
-    def serialize_category_tree(self, category: Category) -> Dict[str, Any]:
-        return category.to_dict(include_subcategories=True)
+    def get_category_product_counts(self, fields: Optional[Set[str]] = None) -> Optional[Dict[int, int]]:
+        if fields is not None and 'product_count' not in fields:
+            return None
+        return self.get_cached_category_tree()['product_counts']
+
+    def serialize_category(self, category: Category, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        return category.to_dict(include_subcategories=False, fields=fields, product_counts=self.get_category_product_counts(fields))
+
+    def serialize_categories(self, categories: List[Category], fields: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        product_counts = self.get_category_product_counts(fields)
+        return [category.to_dict(include_subcategories=False, fields=fields, product_counts=product_counts) for category in categories]
     
     def get_category_breadcrumbs(self, category_id: int) -> List[Dict[str, Any]]:
-        category = self.get_category_by_id(category_id)
-        if not category:
-            return []
-        breadcrumbs = []
-        current = category
-        while current:
-            breadcrumbs.insert(0, {
-                'id': current.id,
-                'name': current.name,
-                'slug': current.slug
-            })
-            if current.parent_category_id:
-                current = self.get_category_by_id(current.parent_category_id)
-            else:
-                current = None
-        return breadcrumbs
+        rows = db.session.execute(
+            select(Category.id, Category.name, Category.slug).join(
+                CategoryClosure, CategoryClosure.ancestor_id == Category.id
+            ).where(CategoryClosure.descendant_id == category_id).order_by(CategoryClosure.depth.desc())
+        ).all()
+        return [{'id': row.id, 'name': row.name, 'slug': row.slug} for row in rows]
 
     def get_category_image_by_id(self, image_id: int) -> Optional[CategoryImage]:
         return db.session.get(CategoryImage, image_id)
@@ -1,10 +1,13 @@
-from typing import Dict, List, Optional, Any, Tuple
+from sqlalchemy.orm import selectinload
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 from app import db
+from utils import paginate_by_cursor, load_only_fields
 from services.cart import CartService
 from models.order import Order, OrderItem
 from services.address import AddressService
 from services.payment import PaymentService
+from services.product import ProductService
 from models.product import Product, ProductVariant
 
 class OrderService:
@@ -12,6 +15,7 @@ class OrderService:
         self.cart_service = CartService()
         self.address_service = AddressService()
         self.payment_service = PaymentService()
+        self.product_service = ProductService()
 
     def get_order_by_id(self, order_id: int) -> Optional[Order]:
         return db.session.get(Order, order_id)
@@ -23,20 +27,41 @@ class OrderService:
             Order.email == email
         ).first()
     
-    def get_orders(self, page: int = 1, per_page: int = 10, user_id: Optional[int] = None, status: Optional[str] = None) -> Tuple[List[Order], int, int]:
+    def get_orders(self, page: int = 1, per_page: int = 10, user_id: Optional[int] = None, status: Optional[str] = None, cursor: Optional[str] = None, include_count: bool = True, fields: Optional[Set[str]] = None) -> Tuple[List[Order], Optional[int], Optional[int], Optional[str]]:
         order_query = db.session.query(Order)
         if user_id:
             order_query = order_query.filter(Order.user_id == user_id)
         if status:
             order_query = order_query.filter(Order.status == status)
-        count = order_query.count()
-        total_pages = (count + per_page - 1) // per_page
-        orders = order_query.order_by(Order.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-        return orders, count, total_pages
+        count, total_pages = None, None
+        if include_count:
+            count = order_query.count()
+            total_pages = (count + per_page - 1) // per_page
+        if fields is not None:
+            order_query = order_query.options(*self.get_order_loader_options(fields))
+        if cursor is not None:
+            orders, next_cursor = paginate_by_cursor(order_query, [Order.created_at, Order.id], cursor, per_page)
+            return orders, count, total_pages, next_cursor
+        orders = order_query.order_by(Order.created_at.desc(), Order.id.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        return orders, count, total_pages, None
+    
+    def get_order_loader_options(self, fields: Set[str]) -> List[Any]:
+        options = [load_only_fields(Order, fields, Order.user_id, Order.shipping_address_id, Order.billing_address_id, Order.payment_id, Order.discount, Order.created_at)]
+        if 'items' in fields:
+            options.append(selectinload(Order.items))
+        if 'user' in fields:
+            options.append(selectinload(Order.user))
+        if 'shipping_address' in fields:
+            options.append(selectinload(Order.shipping_address))
+        if 'billing_address' in fields:
+            options.append(selectinload(Order.billing_address))
+        if 'payment' in fields:
+            options.append(selectinload(Order.payment))
+        return options
     
     def create_order_from_cart(self,data:Dict[str,Any],user_id:Optional[int]=None,session_id:Optional[int]=None)->Dict[str,Any]:
         try:
-            cart=self.cart_service.get_cart(user_id,session_id)
+            cart=self.cart_service.get_cart_for_update(user_id,session_id)
             if not cart or not cart.items:
                 raise ValueError("Cart is empty.")
             shipping_address_id=data.get('shipping_address_id')
@@ -129,8 +154,11 @@ class OrderService:
                     variant.stock-=cart_item.quantity
                 else:
                     product.stock-=cart_item.quantity
+            product_ids=[cart_item.product_id for cart_item in cart.items]
+            self.product_service.refresh_product_aggregates(product_ids)
             self.cart_service.clear_cart(user_id,session_id)
             db.session.commit()
+            self.product_service.invalidate_product_caches(product_ids)
             return{
                 "success":True,
                 "order":order,
@@ -149,6 +177,7 @@ class OrderService:
         order = self.get_order_by_id(order_id)
         if not order:
             return None
+        restocked_product_ids = []
         if status:
             if status == "cancelled" and order.status not in ["cancelled"]:
                 for order_item in order.items:
@@ -158,10 +187,14 @@ class OrderService:
                         variant.stock += order_item.quantity
                     elif product:
                         product.stock += order_item.quantity
+                restocked_product_ids = [order_item.product_id for order_item in order.items]
+                self.product_service.refresh_product_aggregates(restocked_product_ids)
             order.status = status
         if tracking_number:
             order.tracking_number = tracking_number
         db.session.commit()
+        if restocked_product_ids:
+            self.product_service.invalidate_product_caches(restocked_product_ids)
         return order
     
     def cancel_order(self, order: Order) -> Optional[Order]:
@@ -174,8 +207,11 @@ class OrderService:
                 variant.stock += order_item.quantity
             elif product:
                 product.stock += order_item.quantity
+        restocked_product_ids = [order_item.product_id for order_item in order.items]
+        self.product_service.refresh_product_aggregates(restocked_product_ids)
         order.status = 'cancelled'
         db.session.commit()
+        self.product_service.invalidate_product_caches(restocked_product_ids)
         return order
     
     def user_has_purchased(self, user_id: int, product_id: int) -> bool:
@@ -188,5 +224,5 @@ class OrderService:
     def serialize_order_item(self, order_item: OrderItem) -> Dict[str, Any]:
         return order_item.to_dict()
     
-    def serialize_order(self, order: Order) -> Dict[str, Any]:
-        return order.to_dict()
+    def serialize_order(self, order: Order, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        return order.to_dict(fields)
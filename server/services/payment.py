@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from typing import Dict, Optional, Any, Tuple, List
 
 from app import db
+from utils import paginate_by_cursor
 from models.order import Order
 from models.payment import Payment
 from xendit import XenditClient, XenditError, PaymentStatus, PaymentMethod, EWalletType
@@ -61,16 +62,21 @@ class PaymentService:
     def get_payment_by_id(self, payment_id: int) -> Optional[Payment]:
         return db.session.get(Payment, payment_id)
 
-    def get_payments(self, page: int = 1, per_page: int = 10, filters: Optional[Dict[str, Any]] = None) -> Tuple[List[Payment], int, int]:
+    def get_payments(self, page: int = 1, per_page: int = 10, filters: Optional[Dict[str, Any]] = None, cursor: Optional[str] = None, include_count: bool = True) -> Tuple[List[Payment], Optional[int], Optional[int], Optional[str]]:
         payment_query = db.session.query(Payment)
         if filters:
             for key, value in filters.items():
                 if hasattr(Payment, key):
                     payment_query = payment_query.filter(getattr(Payment, key) == value)
-        count = payment_query.count()
-        total_pages = (count + per_page - 1) // per_page
-        payments = payment_query.order_by(Payment.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-        return payments, count, total_pages
+        count, total_pages = None, None
+        if include_count:
+            count = payment_query.count()
+            total_pages = (count + per_page - 1) // per_page
+        if cursor is not None:
+            payments, next_cursor = paginate_by_cursor(payment_query, [Payment.created_at, Payment.id], cursor, per_page)
+            return payments, count, total_pages, next_cursor
+        payments = payment_query.order_by(Payment.created_at.desc(), Payment.id.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        return payments, count, total_pages, None
     
     def create_payment(self, amount: float, currency: str = "PHP", payment_method: str = "CARDS", user_id: Optional[int] = None, **kwargs) -> Dict[str, Any]:
         if payment_method.upper() == "CREDIT_CARD":
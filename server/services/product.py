@@ -1,47 +1,393 @@
-from sqlalchemy import or_, asc, desc
-from typing import Dict, List, Optional, Any, Tuple
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from cachetools import TTLCache
+from sqlalchemy import asc, desc, func, or_, select, update, case
+from typing import Dict, List, Optional, Any, Set, Tuple
+from sqlalchemy.orm import joinedload, selectinload, load_only
+from werkzeug.datastructures import MultiDict
 
 from app import db
+from models.user import User
+from models.review import Review
+from models.category import Category, CategoryClosure
+from models.recommendation import ProductRecommendation
 from models.product import Product, ProductVariant, ProductImage
-from utils import generate_slug, generate_variant_name, upload_image_to_gcs, delete_image_from_gcs
+from utils import generate_slug, generate_variant_name, upload_image_to_gcs, delete_image_from_gcs, paginate_by_cursor, get_cache_version, load_only_fields, parse_fields
+
+PRICE_BUCKETS = [(0, 500), (500, 1000), (1000, 2000), (2000, None)]
+BATCH_LIMIT = 50
+VARIANT_BULK_LIMIT = 1000
+IMAGE_UPLOAD_WORKERS = 4
+
+suggestion_cache = TTLCache(maxsize=512, ttl=300)
+suggestion_cache_lock = Lock()
+facet_cache = TTLCache(maxsize=256, ttl=60)
+facet_cache_lock = Lock()
+product_cache = TTLCache(maxsize=256, ttl=600)
+product_slug_cache = TTLCache(maxsize=512, ttl=600)
+product_option_cache = TTLCache(maxsize=256, ttl=600)
+product_cache_stats = {'hits': 0, 'misses': 0}
+product_cache_lock = Lock()
 
 class ProductService:
+    def get_product_loader_options(self, view: Optional[str] = None, fields: Optional[Set[str]] = None) -> List[Any]:
+        if fields is not None:
+            if 'dimensions' in fields:
+                fields = fields | {'width', 'height', 'length'}
+            options = [load_only_fields(Product, fields, Product.category_id, Product.created_at, Product.display_price)]
+            if 'category_name' in fields or 'category_slug' in fields:
+                options.append(joinedload(Product.category).load_only(Category.id, Category.name, Category.slug))
+            if 'variants' in fields:
+                options.append(selectinload(Product.variants).selectinload(ProductVariant.images))
+            if 'images' in fields:
+                options.append(selectinload(Product.images))
+            if 'reviews' in fields:
+                options.append(selectinload(Product.reviews).selectinload(Review.user).selectinload(User.addresses))
+            return options
+        if view == 'card':
+            return [
+                load_only(Product.id, Product.name, Product.slug, Product.is_active, Product.is_featured, Product.display_price, Product.average_rating, Product.review_count, Product.total_stock, Product.created_at),
+                selectinload(Product.images).load_only(ProductImage.id, ProductImage.product_id, ProductImage.url),
+            ]
+        return [
+            joinedload(Product.category),
+            selectinload(Product.variants).selectinload(ProductVariant.images),
+            selectinload(Product.images),
+            selectinload(Product.reviews).selectinload(Review.user).selectinload(User.addresses),
+        ]
+
+    def refresh_product_aggregates(self, product_ids: List[int]) -> None:
+        product_ids = [product_id for product_id in set(product_ids) if product_id]
+        if not product_ids:
+            return
+        db.session.flush()
+        db.session.execute(
+            update(Product)
+            .where(Product.id.in_(product_ids))
+            .values(**Product.aggregate_expressions())
+        )
+
+    def get_catalog_version(self) -> Tuple:
+        return get_cache_version()
+
     def get_product_by_id(self, product_id: int) -> Optional[Product]:
         return db.session.get(Product, product_id)
     
     def get_product_by_slug(self, slug: str) -> Optional[Product]:
         return db.session.query(Product).filter(Product.slug == slug).first()
+
+    def get_serialized_product(self, product_id: int) -> Optional[Dict[str, Any]]:
+        with product_cache_lock:
+            serialized_product = product_cache.get(product_id)
+            product_cache_stats['hits' if serialized_product is not None else 'misses'] += 1
+        if serialized_product is not None:
+            return serialized_product
+        product = db.session.query(Product).options(*self.get_product_loader_options()).filter(Product.id == product_id).first()
+        if not product:
+            return None
+        return self.cache_serialized_product(product)
+
+    def get_serialized_product_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
+        with product_cache_lock:
+            product_id = product_slug_cache.get(slug)
+            serialized_product = product_cache.get(product_id) if product_id is not None else None
+            if serialized_product is not None and serialized_product['slug'] != slug:
+                serialized_product = None
+            product_cache_stats['hits' if serialized_product is not None else 'misses'] += 1
+        if serialized_product is not None:
+            return serialized_product
+        product = db.session.query(Product).options(*self.get_product_loader_options()).filter(Product.slug == slug).first()
+        if not product:
+            return None
+        return self.cache_serialized_product(product)
+
+    def cache_serialized_product(self, product: Product) -> Dict[str, Any]:
+        serialized_product = self.serialize_product(product)
+        option_index = product.build_option_index()
+        with product_cache_lock:
+            product_cache[product.id] = serialized_product
+            product_slug_cache[product.slug] = product.id
+            product_option_cache[product.id] = option_index
+        return serialized_product
+
+    def get_product_option_index(self, product_id: int) -> Optional[Dict[str, Any]]:
+        with product_cache_lock:
+            option_index = product_option_cache.get(product_id)
+        if option_index is not None:
+            return option_index
+        product = db.session.query(Product).options(
+            load_only(Product.id, Product.option1_name, Product.option2_name, Product.option3_name),
+            selectinload(Product.variants)
+        ).filter(Product.id == product_id).first()
+        if not product:
+            return None
+        option_index = product.build_option_index()
+        with product_cache_lock:
+            product_option_cache[product_id] = option_index
+        return option_index
+
+    def resolve_product_variant(self, product_id: int, option_values: Dict[str, str]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        option_index = self.get_product_option_index(product_id)
+        if option_index is None:
+            return None, None
+        return option_index, Product.resolve_option_index(option_index, option_values)
+
+    def get_product_cache_stats(self) -> Dict[str, Any]:
+        with product_cache_lock:
+            return {
+                'hits': product_cache_stats['hits'],
+                'misses': product_cache_stats['misses'],
+                'size': len(product_cache),
+                'maxsize': product_cache.maxsize,
+                'ttl': product_cache.ttl,
+            }
+
+    def get_serialized_products(self, product_ids: List[int], slugs: List[str], view: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[int], List[str]]:
+        serialized_by_id, serialized_by_slug = {}, {}
+        if view is None:
+            with product_cache_lock:
+                for product_id in product_ids:
+                    serialized_product = product_cache.get(product_id)
+                    if serialized_product is not None:
+                        serialized_by_id[product_id] = serialized_product
+                for slug in slugs:
+                    product_id = product_slug_cache.get(slug)
+                    serialized_product = product_cache.get(product_id) if product_id is not None else None
+                    if serialized_product is not None and serialized_product['slug'] == slug:
+                        serialized_by_slug[slug] = serialized_product
+                hits = len(serialized_by_id) + len(serialized_by_slug)
+                product_cache_stats['hits'] += hits
+                product_cache_stats['misses'] += len(product_ids) + len(slugs) - hits
+        uncached_ids = [product_id for product_id in product_ids if product_id not in serialized_by_id]
+        uncached_slugs = [slug for slug in slugs if slug not in serialized_by_slug]
+        if uncached_ids or uncached_slugs:
+            products = db.session.query(Product).options(*self.get_product_loader_options(view)).filter(
+                or_(Product.id.in_(uncached_ids), Product.slug.in_(uncached_slugs))
+            ).all()
+            for product in products:
+                serialized_product = self.cache_serialized_product(product) if view is None else self.serialize_product(product, view)
+                serialized_by_id[product.id] = serialized_product
+                serialized_by_slug[product.slug] = serialized_product
+        serialized_products = [serialized_by_id[product_id] for product_id in product_ids if product_id in serialized_by_id]
+        serialized_products.extend(serialized_by_slug[slug] for slug in slugs if slug in serialized_by_slug)
+        missing_ids = [product_id for product_id in product_ids if product_id not in serialized_by_id]
+        missing_slugs = [slug for slug in slugs if slug not in serialized_by_slug]
+        return serialized_products, missing_ids, missing_slugs
+    
+    def get_all_products(self, page: int = 1, per_page: int = 10, category_ids: Optional[List[int]] = [], filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None, sort: Optional[str] = None, view: Optional[str] = None, cursor: Optional[str] = None, include_count: bool = True, fields: Optional[Set[str]] = None, category_id: Optional[int] = None) -> Tuple[List[Product], Optional[int], Optional[int], Optional[str]]:
+        product_query = self.filter_products(db.session.query(Product), category_ids, filters, search, category_id)
+        if search and not sort:
+            sort = 'relevance'
+        if sort == 'price_low':
+            sort_columns, descending = [Product.display_price, Product.id], False
+        elif sort == 'price_high':
+            sort_columns, descending = [Product.display_price, Product.id], True
+        elif sort == 'oldest':
+            sort_columns, descending = [Product.created_at, Product.id], False
+        else:
+            sort_columns, descending = [Product.created_at, Product.id], True
+        count, total_pages = None, None
+        if include_count:
+            count = product_query.count()
+            total_pages = (count + per_page - 1) // per_page
+        product_query = product_query.options(*self.get_product_loader_options(view, fields))
+        if cursor is not None:
+            products, next_cursor = paginate_by_cursor(product_query, sort_columns, cursor, per_page, descending)
+            return products, count, total_pages, next_cursor
+        if search and sort == 'relevance':
+            product_query = product_query.order_by(desc(func.ts_rank(Product.search_vector, func.websearch_to_tsquery('english', search))))
+        products = product_query.order_by(*[desc(column) if descending else asc(column) for column in sort_columns]).offset((page - 1) * per_page).limit(per_page).all()
+        return products, count, total_pages, None
     
-    def get_all_products(self, page: int = 1, per_page: int = 10, category_ids: Optional[List[int]] = [], filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None, sort: Optional[str] = None) -> Tuple[List[Product], int, int]:
-        product_query = db.session.query(Product)
-        if len(category_ids) > 0:
+    def filter_products(self, product_query, category_ids: Optional[List[int]] = None, filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None, category_id: Optional[int] = None):
+        if category_ids:
             product_query = product_query.filter(Product.category_id.in_(category_ids))
+        if category_id is not None:
+            product_query = product_query.filter(Product.category_id.in_(
+                select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+            ))
         if filters:
             for key, value in filters.items():
                 if hasattr(Product, key) and key != 'category_id':
                     product_query = product_query.filter(getattr(Product, key) == value)
         if search:
-            search_term = f"%{search}%"
-            product_query = product_query.filter(
-                or_(
-                    Product.name.ilike(search_term),
-                )
+            product_query = product_query.filter(Product.search_vector.op('@@')(func.websearch_to_tsquery('english', search)))
+        return product_query
+
+    def get_product_listing(self, args: MultiDict, category_id: Optional[int] = None) -> Dict[str, Any]:
+        page = args.get('page', 1, type=int)
+        per_page = args.get('per_page', 10, type=int)
+        search = args.get('search', type=str)
+        sort = args.get('sort', type=str)
+        view = args.get('view', type=str)
+        fields = parse_fields(args.get('fields', type=str))
+        facets = args.get('facets', 'false').lower() == 'true'
+        cursor = args.get('cursor', type=str)
+        include_count = args.get('include_count', 'true' if cursor is None else 'false').lower() == 'true'
+        category_ids_str = args.get('category_ids', '')
+        category_ids = [int(cid) for cid in category_ids_str.split(',') if cid.strip()] if category_ids_str else []
+        if category_id is None:
+            category_id = args.get('category_id', type=int)
+        is_featured = args.get('is_featured', type=bool)
+        is_active = args.get('is_active', True, type=bool)
+        filters = {'is_active': is_active}
+        if is_featured is not None:
+            filters['is_featured'] = is_featured
+        products, count, total_pages, next_cursor = self.get_all_products(page, per_page, category_ids, filters, search, sort, view, cursor, include_count, fields, category_id)
+        response = {
+            'products': [self.serialize_product(product, view, fields) for product in products],
+            'count': count,
+            'total_pages': total_pages,
+            'page': page,
+            'per_page': per_page,
+            'next_cursor': next_cursor
+        }
+        if facets:
+            response['facets'] = self.get_product_facets(category_ids, filters, search, category_id)
+        return response
+
+    def get_product_facets(self, category_ids: Optional[List[int]] = None, filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None, category_id: Optional[int] = None) -> Dict[str, Any]:
+        cache_key = (
+            tuple(sorted(set(category_ids or []))),
+            category_id,
+            tuple(sorted((filters or {}).items())),
+            " ".join(search.lower().split()) if search else None,
+        )
+        with facet_cache_lock:
+            facets = facet_cache.get(cache_key)
+        if facets is not None:
+            return facets
+        price_bucket = case(
+            *[(Product.display_price < upper, index) for index, (lower, upper) in enumerate(PRICE_BUCKETS) if upper is not None],
+            else_=len(PRICE_BUCKETS) - 1
+        )
+        facet_query = self.filter_products(
+            db.session.query(
+                Product.category_id.label('category_id'),
+                price_bucket.label('price_bucket'),
+                func.floor(Product.average_rating).label('rating'),
+                (Product.total_stock > 0).label('in_stock'),
+            ),
+            category_ids, filters, search, category_id
+        ).subquery()
+        rows = db.session.query(
+            facet_query.c.category_id,
+            facet_query.c.price_bucket,
+            facet_query.c.rating,
+            facet_query.c.in_stock,
+            func.grouping(facet_query.c.category_id).label('category_grouping'),
+            func.grouping(facet_query.c.price_bucket).label('price_grouping'),
+            func.grouping(facet_query.c.rating).label('rating_grouping'),
+            func.count().label('count')
+        ).group_by(
+            func.grouping_sets(facet_query.c.category_id, facet_query.c.price_bucket, facet_query.c.rating, facet_query.c.in_stock)
+        ).all()
+        category_counts, price_counts, rating_counts, stock_counts = {}, {}, {}, {True: 0, False: 0}
+        for row in rows:
+            if row.category_grouping == 0:
+                category_counts[row.category_id] = row.count
+            elif row.price_grouping == 0:
+                price_counts[row.price_bucket] = row.count
+            elif row.rating_grouping == 0:
+                rating = int(row.rating or 0)
+                rating_counts[rating] = rating_counts.get(rating, 0) + row.count
+            else:
+                stock_counts[bool(row.in_stock)] += row.count
+        facets = {
+            'categories': [
+                {'id': category_id, 'count': count}
+                for category_id, count in sorted(category_counts.items(), key=lambda item: (item[0] is None, item[0] or 0))
+            ],
+            'price': [
+                {'min': lower, 'max': upper, 'count': price_counts.get(index, 0)}
+                for index, (lower, upper) in enumerate(PRICE_BUCKETS)
+            ],
+            'rating': [{'rating': rating, 'count': rating_counts.get(rating, 0)} for rating in range(5, -1, -1)],
+            'in_stock': {'in_stock': stock_counts[True], 'out_of_stock': stock_counts[False]},
+        }
+        with facet_cache_lock:
+            facet_cache[cache_key] = facets
+        return facets
+
+    def get_product_suggestions(self, query: str, limit: int = 8) -> List[Dict[str, Any]]:
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+        cache_key = (query, limit)
+        with suggestion_cache_lock:
+            suggestions = suggestion_cache.get(cache_key)
+        if suggestions is not None:
+            return suggestions
+        pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        thumbnail = (
+            select(ProductImage.url)
+            .where(ProductImage.product_id == Product.id)
+            .order_by(ProductImage.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        matching_categories = select(Category.id).where(Category.name.op('%')(query))
+        rows = db.session.query(Product.id, Product.name, Product.slug, thumbnail.label('thumbnail')).filter(
+            Product.is_active == True,
+            or_(
+                Product.name.ilike(f"%{pattern}%", escape='\\'),
+                Product.name.op('%')(query),
+                Product.category_id.in_(matching_categories)
             )
-        if sort == 'price_low':
-            product_query = product_query.order_by(asc(Product.display_price))
-        elif sort == 'price_high':
-            product_query = product_query.order_by(desc(Product.display_price))
-        elif sort == 'oldest':
-            product_query = product_query.order_by(asc(Product.created_at))
-        else:
-            product_query = product_query.order_by(desc(Product.created_at))
-        count = product_query.count()
-        total_pages = (count + per_page - 1) // per_page
-        products = product_query.offset((page - 1) * per_page).limit(per_page).all()
-        return products, count, total_pages
-    
-    def create_product(self, data: Dict[str, Any]) -> Product:
+        ).order_by(
+            desc(Product.name.ilike(f"{pattern}%", escape='\\')),
+            desc(func.similarity(Product.name, query)),
+            Product.id
+        ).limit(limit).all()
+        suggestions = [
+            {'id': row.id, 'name': row.name, 'slug': row.slug, 'thumbnail': row.thumbnail}
+            for row in rows
+        ]
+        with suggestion_cache_lock:
+            suggestion_cache[cache_key] = suggestions
+        return suggestions
+
+    def invalidate_product_caches(self, product_ids: List[int]) -> None:
+        with product_cache_lock:
+            for product_id in product_ids:
+                product_cache.pop(product_id, None)
+                product_option_cache.pop(product_id, None)
+        with suggestion_cache_lock:
+            suggestion_cache.clear()
+        with facet_cache_lock:
+            facet_cache.clear()
+
+    def upload_product_images(self, images: List[Dict[str, Any]]) -> List[str]:
+        files = [image['file'] for image in images if 'file' in image]
+        if not files:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(files), IMAGE_UPLOAD_WORKERS)) as executor:
+            return list(executor.map(lambda file: upload_image_to_gcs(file, folder="products"), files))
+
+    def build_product_variant(self, product_name: str, data: Dict[str, Any]) -> ProductVariant:
+        option1_value = data.get('option1_value')
+        option2_value = data.get('option2_value')
+        option3_value = data.get('option3_value')
+        return ProductVariant(
+            name=data.get('name') or generate_variant_name(product_name, option1_value, option2_value, option3_value),
+            base_price=data.get('base_price'),
+            sale_price=data.get('sale_price'),
+            stock=data.get('stock', 0),
+            option1_value=option1_value,
+            option2_value=option2_value,
+            option3_value=option3_value,
+            images=[]
+        )
+
+    def create_product(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        images = data.get('images') if isinstance(data.get('images'), list) else []
+        uploaded_urls = []
         try:
+            uploaded_urls = self.upload_product_images(images)
+            image_urls = uploaded_urls + [image['url'] for image in images if image.get('url')]
+            if len(image_urls) < len(images):
+                raise ValueError("No Image Provided")
             product = Product(
                 name=data.get('name'),
                 slug=generate_slug(data.get('name')),
@@ -64,19 +410,24 @@ class ProductService:
                 base_price=data.get('base_price'),
                 sale_price=data.get('sale_price'),
                 stock=data.get('stock'),
+                variants=[self.build_product_variant(data.get('name'), variant_data) for variant_data in data['variants']] if isinstance(data.get('variants'), list) else [],
+                images=[ProductImage(url=image_url) for image_url in image_urls],
+                reviews=[],
             )
             db.session.add(product)
+            db.session.flush()
+            self.refresh_product_aggregates([product.id])
+            serialized_product = self.serialize_product(product)
             db.session.commit()
-            if 'variants' in data and isinstance(data['variants'], list):
-                for variant_data in data['variants']:
-                    self.create_product_variant(product.id, variant_data)
-            if 'images' in data and isinstance(data['images'], list):
-                for image_data in data['images']:
-                    self.create_product_image(product.id, image_data)
-            db.session.refresh(product)
-            return product
+            self.invalidate_product_caches([serialized_product['id']])
+            return serialized_product
         except Exception as e:
             db.session.rollback()
+            for image_url in uploaded_urls:
+                try:
+                    delete_image_from_gcs(image_url)
+                except Exception:
+                    pass
             raise e
         
     def update_product(self, product_id: int, data: Dict[str, Any]) -> Optional[Product]:
@@ -96,7 +447,10 @@ class ProductService:
                         variant.option2_value, 
                         variant.option3_value
                     )
+            if any(field in data for field in ['base_price', 'sale_price', 'stock']):
+                self.refresh_product_aggregates([product.id])
             db.session.commit()
+            self.invalidate_product_caches([product.id])
             return product
         except Exception as e:
             db.session.rollback()
@@ -109,12 +463,17 @@ class ProductService:
         try:
             db.session.delete(product)
             db.session.commit()
+            self.invalidate_product_caches([product_id])
             return True
         except Exception as e:
             db.session.rollback()
             raise e
 
-    def serialize_product(self, product: Product) -> Dict[str, Any]:
+    def serialize_product(self, product: Product, view: Optional[str] = None, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        if fields is not None:
+            return product.to_dict(fields=fields)
+        if view == 'card':
+            return product.to_card_dict()
         return product.to_dict()
     
     def get_product_variant_by_id(self, variant_id: int) -> Optional[ProductVariant]:
@@ -142,7 +501,9 @@ class ProductService:
                 option3_value=option3_value
             )
             db.session.add(variant)
+            self.refresh_product_aggregates([product_id])
             db.session.commit()
+            self.invalidate_product_caches([product_id])
             return variant
         except Exception as e:
             db.session.rollback()
@@ -174,12 +535,89 @@ class ProductService:
                     variant.option2_value, 
                     variant.option3_value
                 )
+            self.refresh_product_aggregates([variant.product_id])
             db.session.commit()
+            self.invalidate_product_caches([variant.product_id])
             return variant
         except Exception as e:
             db.session.rollback()
             raise e
     
+    def bulk_update_product_variants(self, updates: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        variant_ids = [item.get('variant_id') for item in updates]
+        current = {
+            variant_id: (product_id, base_price, sale_price, stock)
+            for variant_id, product_id, base_price, sale_price, stock in db.session.query(
+                ProductVariant.id, ProductVariant.product_id, ProductVariant.base_price, ProductVariant.sale_price, ProductVariant.stock
+            ).filter(ProductVariant.id.in_([variant_id for variant_id in variant_ids if isinstance(variant_id, int) and not isinstance(variant_id, bool)])).all()
+        }
+        rows, errors, product_ids = {}, [], set()
+        for index, item in enumerate(updates):
+            variant_id = item.get('variant_id')
+            if not isinstance(variant_id, int) or isinstance(variant_id, bool):
+                errors.append({'index': index, 'variant_id': variant_id, 'message': 'Variant id must be an integer.'})
+                continue
+            if variant_id not in current:
+                errors.append({'index': index, 'variant_id': variant_id, 'message': 'Variant could not be found.'})
+                continue
+            product_id, base_price, sale_price, stock = current[variant_id]
+            try:
+                base_price = Decimal(str(item['base_price'])) if 'base_price' in item else base_price
+                sale_price = Decimal(str(item['sale_price'])) if item.get('sale_price') is not None else (None if 'sale_price' in item else sale_price)
+            except (TypeError, ValueError, InvalidOperation):
+                errors.append({'index': index, 'variant_id': variant_id, 'message': 'Prices must be numbers.'})
+                continue
+            if 'stock' in item and (not isinstance(item['stock'], int) or isinstance(item['stock'], bool)):
+                errors.append({'index': index, 'variant_id': variant_id, 'message': 'Stock must be an integer.'})
+                continue
+            stock = item.get('stock', stock)
+            if sale_price is not None and base_price is not None and sale_price >= base_price:
+                errors.append({'index': index, 'variant_id': variant_id, 'message': 'Sale price must be less than the base price.'})
+                continue
+            if stock < 0:
+                errors.append({'index': index, 'variant_id': variant_id, 'message': 'Stock cannot be negative.'})
+                continue
+            rows[variant_id] = {'id': variant_id, 'base_price': base_price, 'sale_price': sale_price, 'stock': stock}
+            current[variant_id] = (product_id, base_price, sale_price, stock)
+            product_ids.add(product_id)
+        if errors or not rows:
+            return 0, errors
+        try:
+            db.session.execute(update(ProductVariant), list(rows.values()))
+            self.refresh_product_aggregates(list(product_ids))
+            db.session.commit()
+            self.invalidate_product_caches(list(product_ids))
+            return len(rows), []
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def apply_variant_discount(self, discount_percent: Optional[float], variant_ids: Optional[List[int]] = None, product_ids: Optional[List[int]] = None, category_ids: Optional[List[int]] = None) -> int:
+        if discount_percent is not None and not 0 < discount_percent < 100:
+            raise ValueError("Discount must be between 0 and 100 percent.")
+        criteria = []
+        if variant_ids:
+            criteria.append(ProductVariant.id.in_(variant_ids))
+        if product_ids:
+            criteria.append(ProductVariant.product_id.in_(product_ids))
+        if category_ids:
+            criteria.append(ProductVariant.product_id.in_(select(Product.id).where(Product.category_id.in_(category_ids))))
+        if not criteria:
+            raise ValueError("Variants, products or categories are required.")
+        sale_price = func.round(ProductVariant.base_price * (100 - discount_percent) / 100, 2) if discount_percent is not None else None
+        try:
+            updated_product_ids = db.session.execute(
+                update(ProductVariant).where(or_(*criteria)).values(sale_price=sale_price).returning(ProductVariant.product_id),
+                execution_options={'synchronize_session': False}
+            ).scalars().all()
+            self.refresh_product_aggregates(list(set(updated_product_ids)))
+            db.session.commit()
+            self.invalidate_product_caches(list(set(updated_product_ids)))
+            return len(updated_product_ids)
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
     def delete_product_variant(self, variant_id: int) -> bool:
         variant = self.get_product_variant_by_id(variant_id)
         if not variant:
@@ -190,8 +628,11 @@ class ProductService:
             ).count()
             if variant_count <= 1:
                 return False
+            product_id = variant.product_id
             db.session.delete(variant)
+            self.refresh_product_aggregates([product_id])
             db.session.commit()
+            self.invalidate_product_caches([product_id])
             return True
         except Exception as e:
             db.session.rollback()
@@ -205,11 +646,19 @@ class ProductService:
         if not product:
             return []
         try:
-            recommended = db.session.query(Product).filter(
-                Product.category_id == product.category_id,
-                Product.id != product_id,
+            recommended = db.session.query(Product).join(
+                ProductRecommendation, ProductRecommendation.recommended_product_id == Product.id
+            ).filter(
+                ProductRecommendation.product_id == product_id,
                 Product.is_active == True
-            ).order_by(desc(Product.average_rating)).limit(limit).all()
+            ).order_by(desc(ProductRecommendation.score), Product.id).limit(limit).all()
+            if len(recommended) < limit:
+                recommended.extend(db.session.query(Product).filter(
+                    Product.category_id == product.category_id,
+                    Product.id != product_id,
+                    Product.is_active == True,
+                    Product.id.notin_([p.id for p in recommended])
+                ).order_by(desc(Product.average_rating)).limit(limit - len(recommended)).all())
             if len(recommended) < limit:
                 additional = db.session.query(Product).filter(
                     Product.id != product_id,
@@ -238,6 +687,7 @@ class ProductService:
             )
             db.session.add(image)
             db.session.commit()
+            self.invalidate_product_caches([product_id])
             return image
         except Exception as e:
             db.session.rollback()
@@ -248,9 +698,11 @@ class ProductService:
         if not image:
             return False
         try:
+            product_id = image.product_id
             delete_image_from_gcs(image.url)
             db.session.delete(image)
             db.session.commit()
+            self.invalidate_product_caches([product_id])
             return True
         except Exception as e:
             db.session.rollback()
@@ -0,0 +1,75 @@
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import aliased
+from typing import Dict, Any, Optional
+from sqlalchemy.dialects.postgresql import insert
+
+from app import db
+from models.order import Order, OrderItem, PAID_ORDER_STATUSES
+from models.recommendation import ProductRecommendation, RecommendationRun
+
+class RecommendationService:
+    def get_last_run(self) -> Optional[RecommendationRun]:
+        return db.session.query(RecommendationRun).order_by(RecommendationRun.id.desc()).first()
+
+    def build_recommendations(self, per_product: int) -> RecommendationRun:
+        try:
+            marked_orders = (
+                update(Order)
+                .where(Order.recommended_at.is_(None), Order.status.in_(PAID_ORDER_STATUSES))
+                .values(recommended_at=func.now(), updated_at=Order.updated_at)
+                .returning(Order.id)
+                .cte('marked_orders')
+            )
+            item = aliased(OrderItem)
+            other_item = aliased(OrderItem)
+            pairs = (
+                select(
+                    item.product_id,
+                    other_item.product_id,
+                    func.count(func.distinct(item.order_id))
+                )
+                .join(marked_orders, marked_orders.c.id == item.order_id)
+                .join(other_item, (other_item.order_id == item.order_id) & (other_item.product_id != item.product_id))
+                .group_by(item.product_id, other_item.product_id)
+            )
+            statement = insert(ProductRecommendation).from_select(['product_id', 'recommended_product_id', 'score'], pairs)
+            statement = statement.on_conflict_do_update(
+                constraint='uq_product_recommendation',
+                set_={
+                    'score': ProductRecommendation.score + statement.excluded.score,
+                    'updated_at': func.now()
+                }
+            )
+            upserted_pairs = statement.returning(ProductRecommendation.id).cte('upserted_pairs')
+            processed_orders, updated_pairs = db.session.execute(
+                select(
+                    select(func.count()).select_from(marked_orders).scalar_subquery(),
+                    select(func.count()).select_from(upserted_pairs).scalar_subquery()
+                )
+            ).one()
+            ranked = select(
+                ProductRecommendation.id,
+                func.row_number().over(
+                    partition_by=ProductRecommendation.product_id,
+                    order_by=(ProductRecommendation.score.desc(), ProductRecommendation.recommended_product_id)
+                ).label('rank')
+            ).subquery()
+            pruned_pairs = db.session.execute(
+                delete(ProductRecommendation)
+                .where(ProductRecommendation.id.in_(select(ranked.c.id).where(ranked.c.rank > per_product)))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            run = RecommendationRun(
+                processed_orders=processed_orders,
+                updated_pairs=updated_pairs,
+                pruned_pairs=pruned_pairs
+            )
+            db.session.add(run)
+            db.session.commit()
+            return run
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def serialize_recommendation_run(self, run: RecommendationRun) -> Dict[str, Any]:
+        return run.to_dict()
@@ -1,8 +1,11 @@
-from sqlalchemy import func
-from typing import Dict, List, Optional, Any, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 from app import db
+from utils import paginate_by_cursor, get_cache_version, load_only_fields
 from models.review import Review
+from models.user import User
 from models.product import Product
 from services.user import UserService
 from services.order import OrderService
@@ -14,6 +17,9 @@ class ReviewService:
         self.order_service = OrderService()
         self.user_service = UserService()
 
+    def get_review_version(self) -> Tuple:
+        return get_cache_version()
+
     def get_review_by_id(self, review_id: int) -> Optional[Review]:
         return db.session.query(Review).join(Product, Product.id == Review.product_id).filter(Review.id == review_id).first()
     
@@ -23,7 +29,7 @@ class ReviewService:
             Review.user_id == user_id
         ).first()
     
-    def get_reviews(self, page: int = 1, per_page: int = 10, user_id: Optional[int]=None, product_id:  Optional[int]=None, approved: Optional[bool] = None, verified: Optional[bool] = None) -> Tuple[List[Review], int, int]:
+    def get_reviews(self, page: int = 1, per_page: int = 10, user_id: Optional[int]=None, product_id:  Optional[int]=None, approved: Optional[bool] = None, verified: Optional[bool] = None, cursor: Optional[str] = None, include_count: bool = True, fields: Optional[Set[str]] = None) -> Tuple[List[Review], Optional[int], Optional[int], Optional[Dict[int, int]], Optional[str]]:
         review_query = db.session.query(Review).join(Product, Product.id == Review.product_id)
         if product_id:
             review_query = review_query.filter(Review.product_id == product_id)
@@ -33,12 +39,27 @@ class ReviewService:
             review_query = review_query.filter(Review.is_approved == approved)
         if verified is not None:
             review_query = review_query.filter(Review.is_verified == verified)
-        rating_counts_query = review_query.with_entities(Review.rating, func.count().label('count')).group_by(Review.rating).all()
-        rating_counts = {rating: count for rating, count in rating_counts_query}
-        count = review_query.count()
-        total_pages = (count + per_page - 1) // per_page
-        reviews = review_query.order_by(Review.rating.desc()).offset((page - 1) * per_page).limit(per_page).all()
-        return reviews, count, total_pages, rating_counts
+        count, total_pages, rating_counts = None, None, None
+        if include_count:
+            rating_counts_query = review_query.with_entities(Review.rating, func.count().label('count')).group_by(Review.rating).all()
+            rating_counts = {rating: count for rating, count in rating_counts_query}
+            count = sum(rating_counts.values())
+            total_pages = (count + per_page - 1) // per_page
+        if fields is not None:
+            review_query = review_query.options(*self.get_review_loader_options(fields))
+        if cursor is not None:
+            reviews, next_cursor = paginate_by_cursor(review_query, [Review.rating, Review.id], cursor, per_page)
+            return reviews, count, total_pages, rating_counts, next_cursor
+        reviews = review_query.order_by(Review.rating.desc(), Review.id.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        return reviews, count, total_pages, rating_counts, None
+
+    def get_review_loader_options(self, fields: Set[str]) -> List[Any]:
+        options = [load_only_fields(Review, fields, Review.user_id, Review.product_id, Review.rating)]
+        if 'user' in fields:
+            options.append(selectinload(Review.user).selectinload(User.addresses))
+        if 'product' in fields:
+            options.append(selectinload(Review.product).load_only(Product.id, Product.name, Product.slug))
+        return options
 
     def create_review(self, user_id: int, product_id: int, data: Dict[str, Any]) -> Optional[Review]:
         product = self.product_service.get_product_by_id(product_id)
@@ -55,7 +76,9 @@ class ReviewService:
             is_approved=True if user_has_purchased else False
         )
         db.session.add(review)
+        self.product_service.refresh_product_aggregates([product_id])
         db.session.commit()
+        self.product_service.invalidate_product_caches([product_id])
         return review
     
     def update_review(self, review_id: int, user_id: int, data: Dict[str, Any]) -> Optional[Review]:
@@ -69,17 +92,22 @@ class ReviewService:
         for field in ['is_approved', 'is_verified']:
             if field in data and user.is_admin:
                 setattr(review, field, data[field])
+        self.product_service.refresh_product_aggregates([review.product_id])
         db.session.commit()
+        self.product_service.invalidate_product_caches([review.product_id])
         return review
     
     def delete_review(self, review: Review) -> bool:
+        product_id = review.product_id
         db.session.delete(review)
+        self.product_service.refresh_product_aggregates([product_id])
         db.session.commit()
+        self.product_service.invalidate_product_caches([product_id])
         return True
     
-    def serialize_review(self, review: Review) -> Dict[str, Any]:
-        serialized_review = review.to_dict()
-        if review.product:
+    def serialize_review(self, review: Review, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        serialized_review = review.to_dict(fields)
+        if (fields is None or 'product' in fields) and review.product:
             serialized_review['product'] = {
                 'name': review.product.name,
                 'slug': review.product.slug
@@ -1,7 +1,8 @@
 from sqlalchemy import or_
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple
 
 from app import db
+from utils import paginate_by_cursor
 from models.user import User
 
 class UserService:
@@ -11,7 +12,7 @@ class UserService:
     def get_user_by_email(self, email: str) -> Optional[User]:
         return db.session.query(User).filter(User.email == email).first()
     
-    def get_all_users(self, page: int = 1, per_page: int = 10, filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None) -> List[User]:
+    def get_all_users(self, page: int = 1, per_page: int = 10, filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None, cursor: Optional[str] = None, include_count: bool = True) -> Tuple[List[User], Optional[int], Optional[int], Optional[str]]:
         user_query = db.session.query(User)
         if filters:
             for key, value in filters.items():
@@ -26,10 +27,15 @@ class UserService:
                     User.email.ilike(search_term),
                 )
             )
-        count = user_query.count()
-        total_pages = (count + per_page - 1) // per_page
+        count, total_pages = None, None
+        if include_count:
+            count = user_query.count()
+            total_pages = (count + per_page - 1) // per_page
+        if cursor is not None:
+            users, next_cursor = paginate_by_cursor(user_query, [User.id], cursor, per_page, descending=False)
+            return users, count, total_pages, next_cursor
         users = user_query.order_by(User.id).offset((page - 1) * per_page).limit(per_page).all()
-        return users, count, total_pages
+        return users, count, total_pages, None
     
     def create_user(self, email: str, password: str, **kwargs) -> User:
         user = User(email=email, **kwargs)
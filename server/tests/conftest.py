@@ -0,0 +1,41 @@
+import os
+import pytest
+from sqlalchemy import event, text
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+@pytest.fixture(scope='session')
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set; these tests need a PostgreSQL 15+ database.')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = TEST_DATABASE_URL
+    os.environ.setdefault('JWT_SECRET_KEY', 'test-secret')
+    from app import create_app
+    from models.base import db
+    app = create_app()
+    with app.app_context():
+        db.session.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        db.session.commit()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def session(app):
+    from models.base import db
+    yield db.session
+    db.session.rollback()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+
+@pytest.fixture
+def statements(app):
+    from models.base import db
+    executed = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
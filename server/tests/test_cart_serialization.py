@@ -0,0 +1,49 @@
+import pytest
+from decimal import Decimal
+
+from models.cart import Cart, CartItem
+from models.category import Category
+from models.product import Product, ProductVariant, ProductImage
+from services.cart import CartService
+
+cart_service = CartService()
+
+def build_cart(session, variant_lines: int, product_lines: int) -> Cart:
+    category = Category(name='Skincare', slug='skincare')
+    session.add(category)
+    session.flush()
+    cart = Cart(session_id='test-session')
+    session.add(cart)
+    session.flush()
+    for i in range(variant_lines + product_lines):
+        product = Product(name=f'Product {i}', slug=f'product-{i}', category_id=category.id, base_price=Decimal('100.00'), sale_price=0, stock=10, display_price=Decimal('100.00'), total_stock=10)
+        session.add(product)
+        session.flush()
+        session.add(ProductImage(product_id=product.id, url=f'https://storage.googleapis.com/products/{i}.jpg'))
+        variant = None
+        if i < variant_lines:
+            variant = ProductVariant(product_id=product.id, name=f'Product {i} - S', base_price=Decimal('80.00'), sale_price=0, stock=5, option1_value='S')
+            session.add(variant)
+            session.flush()
+            session.add(ProductImage(product_id=product.id, variant_id=variant.id, url=f'https://storage.googleapis.com/products/{i}-s.jpg'))
+        session.add(CartItem(cart_id=cart.id, product_id=product.id, variant_id=variant.id if variant else None, quantity=2))
+    session.commit()
+    session.refresh(cart)
+    return cart
+
+def count_serialize_statements(cart: Cart, statements) -> int:
+    statements.clear()
+    cart_service.serialize_cart(cart)
+    return len(statements)
+
+@pytest.mark.parametrize('variant_lines, product_lines', [(1, 0), (0, 1), (10, 10), (25, 5)])
+def test_serialize_cart_uses_a_fixed_number_of_statements(session, statements, variant_lines, product_lines):
+    cart = build_cart(session, variant_lines, product_lines)
+    assert count_serialize_statements(cart, statements) == 1
+
+def test_serialize_cart_ignores_zero_sale_prices(session):
+    cart = build_cart(session, 1, 1)
+    data = cart_service.serialize_cart(cart)
+    assert [item['price'] for item in data['items']] == [80.0, 100.0]
+    assert data['subtotal'] == 360.0
+    assert all(item['thumbnail'] for item in data['items'])
@@ -1,12 +1,22 @@
 import re
 import os
+import json
 import uuid
+import base64
 import unicodedata
 import urllib.parse
+from decimal import Decimal
+from datetime import datetime
 from dotenv import load_dotenv
+from typing import Any, List, Optional, Set, Tuple
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.orm import load_only
 from google.cloud import storage
 from werkzeug.datastructures import FileStorage
 
+from models.base import db
+from models.cache import CacheVersion, CATALOG_VERSION
+
 load_dotenv()
 
 GCS_BUCKET_NAME = os.getenv('GCS_BUCKET_NAME')
@@ -47,3 +57,59 @@ def generate_variant_name(product_name: str, option1_value: str = None, option2_
         if option_value:
             variant_name.append(option_value)
     return " - ".join(variant_name) if len(variant_name) > 1 else product_name
+
+class InvalidCursorError(ValueError):
+    pass
+
+def encode_cursor(values: List[Any]) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else str(value) if isinstance(value, Decimal) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, columns: List[Any]) -> List[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise InvalidCursorError("Invalid cursor.")
+        values = []
+        for column, value in zip(columns, payload):
+            python_type = column.type.python_type
+            if value is None:
+                values.append(None)
+            elif python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            else:
+                values.append(python_type(value))
+        return values
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Invalid cursor.")
+
+def paginate_by_cursor(query, columns: List[Any], cursor: str, per_page: int, descending: bool = True) -> Tuple[List[Any], Optional[str]]:
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        boundary = tuple_(*[literal(value, column.type) for column, value in zip(columns, values)])
+        query = query.filter(key < boundary if descending else key > boundary)
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    items = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return items, next_cursor
+
+def parse_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(',') if field.strip()} | {'id'}
+
+def load_only_fields(model, fields: Set[str], *required: Any) -> Any:
+    columns = [getattr(model, prop.key) for prop in model.__mapper__.column_attrs if prop.key in fields and not prop.deferred]
+    return load_only(*columns, *required)
+
+def get_cache_version(name: str = CATALOG_VERSION) -> Tuple:
+    row = db.session.execute(select(CacheVersion.version, CacheVersion.updated_at).where(CacheVersion.name == name)).first()
+    return tuple(row) if row else (0, None)
+
+def get_last_modified(version: Tuple) -> Optional[datetime]:
+    timestamps = [value for value in version if isinstance(value, datetime)]
+    return max(timestamps) if timestamps else None